@@ -0,0 +1,65 @@
+"""
+Тонкая асинхронная обертка над синхронным DAO: каждый вызов уходит
+в пул потоков через asyncio.to_thread, чтобы SQL-запросы не блокировали
+event loop. Размер пула задается в run.py при старте процесса.
+"""
+import asyncio
+from typing import Any, Callable, List, Optional
+
+from app.db.database import db
+
+
+async def get_or_create_referral_user(user_id: int, username: Optional[str],
+                                      referral_code_factory: Callable[[], str]):
+    return await asyncio.to_thread(
+        db.get_or_create_referral_user, user_id, username, referral_code_factory
+    )
+
+
+async def get_referral_stats(user_id: int):
+    return await asyncio.to_thread(db.get_referral_stats, user_id)
+
+
+async def get_payout_readiness(user_id: int):
+    return await asyncio.to_thread(db.get_payout_readiness, user_id)
+
+
+async def get_referral_earnings(referrer_id: int, status: Optional[str] = None,
+                                limit: Optional[int] = None) -> List[Any]:
+    return await asyncio.to_thread(db.get_referral_earnings, referrer_id, status, limit)
+
+
+async def update_referral_user_payout_info(user_id: int, method: str,
+                                           card_number: Optional[str],
+                                           phone_number: Optional[str],
+                                           full_name: str) -> bool:
+    return await asyncio.to_thread(
+        db.update_referral_user_payout_info,
+        user_id=user_id,
+        method=method,
+        card_number=card_number,
+        phone_number=phone_number,
+        full_name=full_name,
+    )
+
+
+async def create_referral_payout_request(referrer_id: int, amount: float,
+                                         method: str, recipient_info: str):
+    return await asyncio.to_thread(
+        db.create_referral_payout_request,
+        referrer_id=referrer_id,
+        amount=amount,
+        method=method,
+        recipient_info=recipient_info,
+    )
+
+
+async def get_referral_user_by_code(referral_code: str):
+    return await asyncio.to_thread(db.get_referral_user_by_code, referral_code)
+
+
+async def attach_referrer(user_id: int, username: Optional[str], referral_code: str,
+                          new_code_factory: Callable[[], str]) -> str:
+    return await asyncio.to_thread(
+        db.attach_referrer, user_id, username, referral_code, new_code_factory
+    )
@@ -4,11 +4,24 @@ from sqlalchemy.orm import Session as DBSession
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import func, case
 import logging
-import json
+
+try:
+    import orjson
+
+    def _json_dumps(data):
+        return orjson.dumps(data).decode()
+
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+
+    _json_dumps = json.dumps
+    _json_loads = json.loads
 
 from app.db.models import (
     Session, ClientOrder, TeamApplication, ConsultationRequest,
-    PortfolioProject, UserSession, ReferralUser, ReferralEarning, ReferralPayout, engine
+    PortfolioProject, UserSession, ReferralUser, ReferralEarning, ReferralPayout, engine,
+    ReferralStats, PayoutReadiness
 )
 from config import config
 
@@ -464,13 +477,13 @@ class DatabaseManager:
                 user_session = session.query(UserSession).filter(UserSession.user_id == user_id).first()
                 if user_session:
                     user_session.current_state = state
-                    user_session.state_data = json.dumps(data)
+                    user_session.state_data = _json_dumps(data)
                     user_session.last_activity = func.now()
                 else:
                     user_session = UserSession(
                         user_id=user_id,
                         current_state=state,
-                        state_data=json.dumps(data)
+                        state_data=_json_dumps(data)
                     )
                     session.add(user_session)
                 return True
@@ -487,7 +500,7 @@ class DatabaseManager:
                 if user_session:
                     return {
                         'state': user_session.current_state,
-                        'data': json.loads(user_session.state_data) if user_session.state_data else {}
+                        'data': _json_loads(user_session.state_data) if user_session.state_data else {}
                     }
                 return None
         except Exception as e:
@@ -539,6 +552,36 @@ class DatabaseManager:
         finally:
             session.close()
 
+    def get_or_create_referral_user(self, user_id, username, referral_code_factory):
+        """Получение реферального пользователя с созданием при отсутствии.
+
+        Одна сессия и один SELECT вместо пары get + create из обработчика;
+        фабрика кода вызывается только если запись действительно создается.
+        """
+        try:
+            session = Session()
+            referral_user = session.query(ReferralUser).filter_by(user_id=user_id).first()
+            if referral_user:
+                return referral_user
+
+            referral_user = ReferralUser(
+                user_id=user_id,
+                username=username,
+                referral_code=referral_code_factory()
+            )
+            session.add(referral_user)
+            session.commit()
+
+            logger.info(f"Referral user created: {user_id}")
+            return referral_user
+
+        except Exception as e:
+            logger.error(f"Error getting or creating referral user: {e}")
+            session.rollback()
+            return None
+        finally:
+            session.close()
+
     def get_referral_user(self, user_id):
         """Получение реферального пользователя"""
         try:
@@ -561,6 +604,46 @@ class DatabaseManager:
         finally:
             session.close()
 
+    def attach_referrer(self, user_id, username, referral_code, new_code_factory):
+        """Привязка пользователя к рефереру по коду за одну сессию.
+
+        Возвращает 'ok', 'self', 'already_ref', 'bad_code' или 'error'.
+        Все проверки и запись происходят в одной транзакции — вместо трех
+        отдельных DAO-вызовов, из которых запись referred_by на отсоединенном
+        объекте вообще не доходила до БД.
+        """
+        try:
+            session = Session()
+            referrer = session.query(ReferralUser).filter_by(referral_code=referral_code).first()
+            if not referrer:
+                return 'bad_code'
+            if referrer.user_id == user_id:
+                return 'self'
+
+            existing = session.query(ReferralUser).filter_by(user_id=user_id).first()
+            if existing:
+                if existing.referred_by:
+                    return 'already_ref'
+                existing.referred_by = referrer.user_id
+            else:
+                session.add(ReferralUser(
+                    user_id=user_id,
+                    username=username,
+                    referral_code=new_code_factory(),
+                    referred_by=referrer.user_id
+                ))
+            session.commit()
+
+            logger.info(f"User {user_id} became referral of {referrer.user_id}")
+            return 'ok'
+
+        except Exception as e:
+            logger.error(f"Error attaching referrer: {e}")
+            session.rollback()
+            return 'error'
+        finally:
+            session.close()
+
     def update_referral_user_payout_info(self, user_id, method, card_number=None, phone_number=None, full_name=None):
         """Обновление данных для выплат"""
         try:
@@ -642,16 +725,19 @@ class DatabaseManager:
         finally:
             session.close()
 
-    def get_referral_earnings(self, referrer_id, status=None):
+    def get_referral_earnings(self, referrer_id, status=None, limit=None):
         """Получение начислений реферера"""
         try:
             session = Session()
             query = session.query(ReferralEarning).filter_by(referrer_id=referrer_id)
-            
+
             if status:
                 query = query.filter_by(status=status)
-            
-            return query.order_by(ReferralEarning.created_at.desc()).all()
+
+            query = query.order_by(ReferralEarning.created_at.desc())
+            if limit is not None:
+                query = query.limit(limit)
+            return query.all()
             
         except Exception as e:
             logger.error(f"Error getting referral earnings: {e}")
@@ -676,17 +762,17 @@ class DatabaseManager:
                 referral_user.total_referrals = referrals_count
                 session.commit()
             
-            return {
-                'referral_code': referral_user.referral_code,
-                'total_referrals': referrals_count,
-                'total_earned': referral_user.total_earned,
-                'balance': referral_user.balance,
-                'total_paid': referral_user.total_paid,
-                'payout_method': referral_user.payout_method,
-                'card_number': referral_user.card_number,
-                'phone_number': referral_user.phone_number,
-                'full_name': referral_user.full_name
-            }
+            return ReferralStats(
+                referral_code=referral_user.referral_code,
+                total_referrals=referrals_count,
+                total_earned=referral_user.total_earned,
+                balance=referral_user.balance,
+                total_paid=referral_user.total_paid,
+                payout_method=referral_user.payout_method,
+                card_number=referral_user.card_number,
+                phone_number=referral_user.phone_number,
+                full_name=referral_user.full_name
+            )
             
         except Exception as e:
             logger.error(f"Error getting referral stats: {e}")
@@ -694,6 +780,38 @@ class DatabaseManager:
         finally:
             session.close()
 
+    def get_payout_readiness(self, user_id):
+        """Узкая выборка полей, нужных для проверки запроса на выплату.
+
+        Не считает агрегаты и не собирает ORM-объект — только пять скаляров.
+        """
+        try:
+            session = Session()
+            row = session.query(
+                ReferralUser.balance,
+                ReferralUser.full_name,
+                ReferralUser.card_number,
+                ReferralUser.phone_number,
+                ReferralUser.payout_method
+            ).filter_by(user_id=user_id).first()
+
+            if not row:
+                return None
+
+            return PayoutReadiness(
+                balance=row.balance,
+                full_name=row.full_name,
+                card_number=row.card_number,
+                phone_number=row.phone_number,
+                payout_method=row.payout_method
+            )
+
+        except Exception as e:
+            logger.error(f"Error getting payout readiness: {e}")
+            return None
+        finally:
+            session.close()
+
     def create_referral_payout_request(self, referrer_id, amount, method, recipient_info):
         """Создание запроса на выплату"""
         try:
@@ -1,3 +1,5 @@
+from typing import NamedTuple, Optional
+
 from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Index, Float, Boolean, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
@@ -201,6 +203,27 @@ class ReferralPayout(Base):
     )
 
 # Инициализация базы данных
+class ReferralStats(NamedTuple):
+    """Статистика реферера плоским кортежем: чтение полей — C-доступ
+    по индексу вместо хэширования ключей dict на каждый рендер"""
+    referral_code: str
+    total_referrals: int
+    total_earned: float
+    balance: float
+    total_paid: float
+    payout_method: Optional[str]
+    card_number: Optional[str]
+    phone_number: Optional[str]
+    full_name: Optional[str]
+
+class PayoutReadiness(NamedTuple):
+    """Минимум полей для проверки запроса на выплату"""
+    balance: float
+    full_name: Optional[str]
+    card_number: Optional[str]
+    phone_number: Optional[str]
+    payout_method: Optional[str]
+
 engine = create_engine(config.DATABASE_URL, echo=False)
 Base.metadata.create_all(engine)
 # Важно: не истекать атрибуты после commit, чтобы можно было безопасно
@@ -10,17 +10,18 @@ from config import config
 from app.db.database import db
 from app.keyboards import kb
 from app.fsm import AdminStates
-from app.utils.message_manager import MessageManager
+from app.utils.message_manager import message_manager
 from app.utils.notification_manager import NotificationManager
 from app.utils.error_handler import error_handler, ErrorHandler
 from app.utils.ui_components import UIComponents
 from app.utils.cache_manager import DataValidator, cache, invalidate_admin_cache
+from app.handlers.main import invalidate_portfolio_cache
 from app.utils.performance_monitor import monitor_performance, performance_monitor
 
 admin_router = Router()
 
-# Менеджеры
-message_manager = MessageManager()
+# Менеджеры (message_manager — общий синглтон, чтобы кэш рендеров
+# и message_id не расходились между обработчиками)
 notification_manager = NotificationManager()
 
 # ================== ОСНОВНЫЕ ФУНКЦИИ АДМИНКИ ================== #
@@ -726,6 +727,7 @@ async def portfolio_add_bot_url(message: types.Message, state: FSMContext, bot:
 
     project = db.create_portfolio_project(project_data)
     if project:
+        invalidate_portfolio_cache()
         await message.answer("✅ Проект успешно добавлен в портфолио!")
     else:
         await message.answer("❌ Ошибка при добавлении проекта!")
@@ -901,6 +903,7 @@ async def portfolio_edit_field(message: types.Message, state: FSMContext, bot: B
     
     project = db.update_portfolio_project(project_id, {field: new_value})
     if project:
+        invalidate_portfolio_cache()
         await message.answer(f"✅ {field.capitalize()} успешно обновлено!")
     else:
         await message.answer("❌ Проект не найден!")
@@ -953,6 +956,7 @@ async def portfolio_delete_confirm(callback: types.CallbackQuery):
     """Удаление проекта"""
     project_id = int(callback.data.split("_")[2])
     if db.delete_portfolio_project(project_id):
+        invalidate_portfolio_cache()
         await callback.answer("✅ Проект удален!", show_alert=True)
         await admin_portfolio(callback)
     else:
@@ -1173,7 +1177,7 @@ async def confirm_payment(callback: types.CallbackQuery, state: FSMContext, bot:
                         f"💰 <b>Новое начисление!</b>\n\n"
                         f"👤 Ваш реферал оплатил заказ\n"
                         f"💵 Начислено: {commission:,.2f}₽\n"
-                        f"💳 Доступно к выводу: {referrer_stats['balance']:,.2f}₽",
+                        f"💳 Доступно к выводу: {referrer_stats.balance:,.2f}₽",
                         parse_mode="HTML"
                     )
             except Exception as e:
@@ -1274,9 +1278,9 @@ async def show_payout_details(callback: types.CallbackQuery, payout_id: int, cur
     if referrer_stats:
         text += (
             f"📊 <b>Статистика реферера:</b>\n"
-            f"👥 Всего рефералов: {referrer_stats['total_referrals']}\n"
-            f"💵 Всего заработано: {referrer_stats['total_earned']:,.2f}₽\n"
-            f"💳 Баланс: {referrer_stats['balance']:,.2f}₽\n"
+            f"👥 Всего рефералов: {referrer_stats.total_referrals}\n"
+            f"💵 Всего заработано: {referrer_stats.total_earned:,.2f}₽\n"
+            f"💳 Баланс: {referrer_stats.balance:,.2f}₽\n"
         )
     
     if payout.admin_notes:
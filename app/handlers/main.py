@@ -1,5 +1,11 @@
+import asyncio
 import logging
+import time
+from contextlib import suppress
+from types import SimpleNamespace
 from typing import Optional, Dict, Any
+
+import orjson
 from aiogram import types, F, Router, Bot
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
@@ -12,24 +18,210 @@ from config import config
 # from app.handlers.portfolio import PortfolioHandler  # Временно отключено
 from app.handlers.referral import ReferralHandler
 from app.db.database import db
-from app.keyboards import kb
+from app.keyboards import kb, PortfolioNav
 from app.fsm import ClientOrder, JoinTeam, Portfolio, Consultation, ReferralSystem
-from app.utils.message_manager import MessageManager
+from app.utils.message_manager import MessageManager, message_manager
 from app.utils.notification_manager import NotificationManager
 from app.utils.error_handler import error_handler, ErrorHandler
 from app.utils.ui_components import UIComponents
 from app.utils.cache_manager import DataValidator, cache
 from app.utils.performance_monitor import monitor_performance, performance_monitor
+from app.utils.redis_service import get_redis
 
 main_router = Router()
 
+# frozenset — O(1) проверка прав без повторного обхода списка
+_ADMIN_IDS = frozenset(config.ADMIN_IDS)
+
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
-# Менеджеры
-message_manager = MessageManager()
+# Менеджеры (message_manager — общий синглтон, чтобы кэш рендеров
+# и message_id не расходились между обработчиками)
 notification_manager = NotificationManager()
 
+async def _advance_state(state: FSMContext, next_state, **fields) -> None:
+    """Переход к следующему шагу анкеты: одно чтение + одна запись в storage
+    вместо отдельных update_data() и set_state()."""
+    if fields:
+        data = await state.get_data()
+        data.update(fields)
+        await state.set_data(data)
+    await state.set_state(next_state)
+
+# Кэш списка проектов портфолио: навигация по карточкам не ходит в БД
+# на каждое нажатие, данные меняются редко. L1 — в процессе, L2 — общий
+# Redis (если настроен), чтобы кэш разделялся между воркерами
+_PORTFOLIO_CACHE_TTL = 60.0
+_PORTFOLIO_REDIS_KEY = "portfolio:projects"
+_PORTFOLIO_FIELDS = (
+    "id", "title", "description", "details", "cost",
+    "technologies", "duration", "video_url", "bot_url",
+)
+_portfolio_cache = {"data": None, "ts": 0.0}
+
+def _fmt_cost(cost) -> str:
+    """Стоимость с разделителем тысяч: формат ':_' дешевле, чем
+    локалезависимая запятая с последующим replace."""
+    try:
+        return f"{int(cost):_}".replace("_", " ")
+    except Exception:
+        return str(cost) if cost is not None else "—"
+
+class _PortfolioCard:
+    """Предрассчитанная карточка проекта: тексты обеих вкладок и их
+    emoji-entities собираются один раз при загрузке списка, prev/next
+    и «Подробнее» не пересобирают строки на каждое нажатие."""
+
+    __slots__ = (
+        "id", "title", "video_url", "bot_url",
+        "text_viewing", "text_details",
+        "entities_viewing", "entities_details",
+    )
+
+    def __init__(self, project, index: int, total: int):
+        self.id = getattr(project, "id", None)
+        self.title = project.title
+        self.video_url = getattr(project, "video_url", None)
+        self.bot_url = getattr(project, "bot_url", None)
+
+        cost_str = _fmt_cost(getattr(project, "cost", None))
+
+        header = [f"📌 <b>{project.title}</b>", "────────────"]
+        duration = getattr(project, "duration", None)
+        middle = [f"⏱️ <b>Длительность разработки:</b> {duration}"] if duration else []
+        footer = [
+            f"💰 <b>Стоимость:</b> {cost_str} ₽",
+            "────────────",
+            f"📊 Проект {index + 1} из {total}",
+        ]
+
+        self.text_viewing = "\n".join(
+            header + [f"📝 <i>{project.description}</i>"] + middle + footer
+        )
+        self.text_details = "\n".join(
+            header + [f"📋 <b>Описание:</b>\n{project.details}"] + middle + footer
+        )
+        self.entities_viewing = MessageManager.cached_custom_emoji_entities(self.text_viewing)
+        self.entities_details = MessageManager.cached_custom_emoji_entities(self.text_details)
+
+async def _cached_projects():
+    now = time.monotonic()
+    if _portfolio_cache["data"] is not None and now - _portfolio_cache["ts"] < _PORTFOLIO_CACHE_TTL:
+        return _portfolio_cache["data"]
+
+    projects = None
+    redis = get_redis()
+    if redis is not None:
+        try:
+            raw = await redis.get(_PORTFOLIO_REDIS_KEY)
+            if raw:
+                projects = [SimpleNamespace(**item) for item in orjson.loads(raw)]
+        except Exception as e:
+            logger.warning("Portfolio cache read from Redis failed: %s", e)
+
+    if projects is None:
+        projects = db.get_portfolio_projects()
+        if redis is not None:
+            try:
+                payload = orjson.dumps([
+                    {field: getattr(p, field, None) for field in _PORTFOLIO_FIELDS}
+                    for p in projects
+                ])
+                await redis.setex(_PORTFOLIO_REDIS_KEY, int(_PORTFOLIO_CACHE_TTL), payload)
+            except Exception as e:
+                logger.warning("Portfolio cache write to Redis failed: %s", e)
+
+    total = len(projects)
+    cards = [_PortfolioCard(p, i, total) for i, p in enumerate(projects)]
+    _portfolio_cache["data"] = cards
+    _portfolio_cache["ts"] = now
+    return cards
+
+def invalidate_portfolio_cache() -> None:
+    """Сброс кэша портфолио — вызывается из админ-обработчиков при изменениях."""
+    _portfolio_cache["data"] = None
+    _portfolio_cache["ts"] = 0.0
+    redis = get_redis()
+    if redis is not None:
+        with suppress(Exception):
+            asyncio.get_running_loop().create_task(redis.delete(_PORTFOLIO_REDIS_KEY))
+
+# Фоновая очередь тяжёлой работы (INSERT в БД, уведомления админов):
+# пользователь получает подтверждение сразу, остальное делают воркеры
+_BG_WORKERS = 2
+_BG_DB_OPS = {
+    "team_app": db.create_team_application,
+    "consultation": db.create_consultation_request,
+}
+_bg_queue: Optional[asyncio.Queue] = None
+
+async def _bg_worker(queue: asyncio.Queue) -> None:
+    while True:
+        kind, payload, bot = await queue.get()
+        try:
+            record = await asyncio.to_thread(_BG_DB_OPS[kind], payload["data"])
+            if record:
+                await notification_manager.notify_admins(payload["admin_text"], bot)
+                await asyncio.to_thread(db.delete_user_session, payload["data"]["user_id"])
+            else:
+                logger.error("Background save failed (%s) for user %s", kind, payload['data']['user_id'])
+        except Exception as e:
+            logger.error("Background worker error (%s): %s", kind, e)
+        finally:
+            queue.task_done()
+
+def _enqueue_background(kind: str, payload: Dict[str, Any], bot: Bot) -> None:
+    """Постановка тяжёлой работы в очередь; воркеры стартуют лениво
+    на текущем event loop при первом обращении."""
+    global _bg_queue
+    if _bg_queue is None:
+        _bg_queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        for _ in range(_BG_WORKERS):
+            loop.create_task(_bg_worker(_bg_queue))
+    _bg_queue.put_nowait((kind, payload, bot))
+
+# Статические тексты — собираются один раз при импорте,
+# без повторной конкатенации f-строк на каждый рендер
+_REFERRAL_WELCOME = (
+    f"{config.EMOJI.gift} <b>Добро пожаловать!</b>\n\n"
+    f"Вы перешли по реферальной ссылке. Теперь при оформлении заказа "
+    f"ваш реферер получит бонус!\n\n"
+    f"{config.EMOJI.info} <i>Это никак не влияет на стоимость ваших заказов</i>"
+)
+
+_FUNCTIONALITY_PROMPT_BOT = (
+    f"{config.EMOJI.robot} <b>Функционал бота</b>\n\n{config.EMOJI.pencil} <i>Шаг 2 из 4</i>\n\n{config.EMOJI.tools} <b>Опишите желаемый функционал:</b>\n\n"
+    f"{config.EMOJI.check} Какие функции должен выполнять бот?\n"
+    f"{config.EMOJI.check} Какие команды нужны пользователям?\n"
+    f"{config.EMOJI.check} Нужны ли интеграции с внешними сервисами?\n"
+    f"{config.EMOJI.check} Особые требования к функционалу?\n\n"
+    f"{config.EMOJI.bulb} <i>Чем подробнее описание, тем точнее будет оценка!</i>"
+)
+_SPECIALIZATION_PROMPT = (
+    f"{config.EMOJI.gear} <b>Специализация</b>\n\n{config.EMOJI.pencil} <i>Финальный шаг</i>\n\n{config.EMOJI.target} <b>Выберите направление:</b>\n\n"
+    f"{config.EMOJI.computer} Frontend/Backend разработка\n"
+    f"{config.EMOJI.phone} Мобильная разработка\n"
+    f"{config.EMOJI.cloud} DevOps/Системная администрация\n"
+    f"{config.EMOJI.art} UI/UX дизайн\n"
+    f"{config.EMOJI.shield} Тестирование и QA\n"
+    f"{config.EMOJI.rocket} Product Management\n"
+    f"{config.EMOJI.bulb} Другое направление\n\n"
+    f"{config.EMOJI.info} <i>Можете указать несколько направлений</i>"
+)
+
+_CONSULTATION_PROMPT = "💬 <b>Консультация</b>\n\nОпишите ваш вопрос подробно:"
+
+_FUNCTIONALITY_PROMPT_MINIAPP = (
+    f"{config.EMOJI.phone} <b>Функционал мини-приложения</b>\n\n{config.EMOJI.pencil} <i>Шаг 2 из 4</i>\n\n{config.EMOJI.tools} <b>Опишите желаемый функционал:</b>\n\n"
+    f"{config.EMOJI.check} Какие страницы и разделы нужны?\n"
+    f"{config.EMOJI.check} Какой функционал должен быть в приложении?\n"
+    f"{config.EMOJI.check} Нужна ли авторизация и личные данные?\n"
+    f"{config.EMOJI.check} Интеграции с API и внешними сервисами?\n\n"
+    f"{config.EMOJI.bulb} <i>Чем подробнее описание, тем точнее будет оценка!</i>"
+)
+
 class MainHandler:
     """Основной обработчик для главных функций бота"""
     
@@ -38,6 +230,7 @@ class MainHandler:
         """Обработчик команды /start"""
         try:
             user_id = message.from_user.id
+            is_admin = user_id in _ADMIN_IDS
             
             # Очищаем состояние
             await state.clear()
@@ -45,37 +238,29 @@ class MainHandler:
             # Удаляем сессию из БД если она есть
             db.delete_user_session(user_id)
             
-            # Проверяем реферальную ссылку
-            if message.text and len(message.text.split()) > 1:
-                start_param = message.text.split()[1]
-                if start_param.startswith('ref_'):
-                    referral_code = start_param[4:]  # Убираем 'ref_'
-                    success = await ReferralHandler.process_referral_start(
-                        user_id, referral_code, message.from_user.username
-                    )
-                    if success:
-                        await message.answer(
-                            f"{config.EMOJI['gift']} <b>Добро пожаловать!</b>\n\n"
-                            f"Вы перешли по реферальной ссылке. Теперь при оформлении заказа "
-                            f"ваш реферер получит бонус!\n\n"
-                            f"{config.EMOJI['info']} <i>Это никак не влияет на стоимость ваших заказов</i>",
-                            parse_mode="HTML"
-                        )
+            # Проверяем реферальную ссылку (/start ref_XXX)
+            _, sep, start_param = (message.text or '').partition(' ')
+            if sep and start_param.startswith('ref_'):
+                referral_code = start_param[4:]  # Убираем 'ref_'
+                success = await ReferralHandler.process_referral_start(
+                    user_id, referral_code, message.from_user.username
+                )
+                if success:
+                    await message.answer(_REFERRAL_WELCOME)
             
             # Отправляем приветственное сообщение
             sent = await message.answer(
                 config.MESSAGES["welcome"],
-                reply_markup=kb.main_menu(user_id, user_id in config.ADMIN_IDS),
-                parse_mode="HTML"
+                reply_markup=kb.main_menu(user_id, is_admin)
             )
             
             # Сохраняем ID главного сообщения
             message_manager.set_main_message(user_id, sent.message_id)
             
-            logger.info(f"User {user_id} started the bot")
+            logger.info("User %s started the bot", user_id)
             
         except Exception as e:
-            logger.error(f"Error in start command: {e}")
+            logger.error("Error in start command: %s", e)
             await message.answer(config.MESSAGES["error_occurred"])
 
     @staticmethod
@@ -83,6 +268,7 @@ class MainHandler:
         """Возврат в главное меню"""
         try:
             user_id = callback.from_user.id
+            is_admin = user_id in _ADMIN_IDS
             await state.clear()
             
             # Очищаем сессию
@@ -96,23 +282,16 @@ class MainHandler:
                 sent = await bot.send_message(
                     user_id,
                     config.MESSAGES["welcome"],
-                    reply_markup=kb.main_menu(user_id, user_id in config.ADMIN_IDS),
-                    parse_mode="HTML"
+                    reply_markup=kb.main_menu(user_id, is_admin)
                 )
                 message_manager.set_main_message(user_id, sent.message_id)
                 # Пытаемся удалить предыдущее медиа, чтобы не засорять чат
-                try:
-                    await bot.delete_message(user_id, callback.message.message_id)
-                except Exception:
-                    pass
+                await message_manager.safe_delete(user_id, callback.message.message_id, bot)
                 
                 # Чистим сохраненный id сообщения об успехе
                 success_msg_id = message_manager.get_success_message(user_id)
                 if success_msg_id and success_msg_id != sent.message_id:
-                    try:
-                        await bot.delete_message(user_id, success_msg_id)
-                    except Exception:
-                        pass
+                    await message_manager.safe_delete(user_id, success_msg_id, bot)
                 message_manager.clear_success_message(user_id)
                 await callback.answer()
                 return
@@ -122,7 +301,7 @@ class MainHandler:
                 user_id,
                 config.MESSAGES["welcome"],
                 callback.message.message_id,
-                kb.main_menu(user_id, user_id in config.ADMIN_IDS),
+                kb.main_menu(user_id, is_admin),
                 bot
             )
             
@@ -134,7 +313,7 @@ class MainHandler:
                         user_id,
                         config.MESSAGES["welcome"],
                         main_msg_id,
-                        kb.main_menu(user_id, user_id in config.ADMIN_IDS),
+                        kb.main_menu(user_id, is_admin),
                         bot
                     )
             
@@ -143,8 +322,7 @@ class MainHandler:
                 sent = await bot.send_message(
                     user_id,
                     config.MESSAGES["welcome"],
-                    reply_markup=kb.main_menu(user_id, user_id in config.ADMIN_IDS),
-                    parse_mode="HTML"
+                    reply_markup=kb.main_menu(user_id, is_admin)
                 )
                 message_manager.set_main_message(user_id, sent.message_id)
             else:
@@ -156,16 +334,13 @@ class MainHandler:
             if success_msg_id:
                 # Если это не то же самое сообщение, попробуем его удалить
                 if success_msg_id != callback.message.message_id:
-                    try:
-                        await bot.delete_message(user_id, success_msg_id)
-                    except Exception as e:
-                        logger.warning(f"Could not delete old success message: {e}")
+                    await message_manager.safe_delete(user_id, success_msg_id, bot)
                 message_manager.clear_success_message(user_id)
             
             await callback.answer()
             
         except Exception as e:
-            logger.error(f"Error in back_to_main: {e}")
+            logger.error("Error in back_to_main: %s", e)
             await callback.answer(config.MESSAGES["error_occurred"], show_alert=True)
 
     @staticmethod
@@ -173,6 +348,7 @@ class MainHandler:
         """Отмена текущей анкеты"""
         try:
             user_id = callback.from_user.id
+            is_admin = user_id in _ADMIN_IDS
             await state.clear()
             
             # Очищаем сессию
@@ -183,14 +359,14 @@ class MainHandler:
                 user_id,
                 f"{config.MESSAGES['cancelled']}\n\n{config.MESSAGES['welcome']}",
                 callback.message.message_id,
-                kb.main_menu(user_id, user_id in config.ADMIN_IDS),
+                kb.main_menu(user_id, is_admin),
                 bot
             )
             
             await callback.answer()
             
         except Exception as e:
-            logger.error(f"Error in cancel_questionnaire: {e}")
+            logger.error("Error in cancel_questionnaire: %s", e)
             await callback.answer(config.MESSAGES["error_occurred"], show_alert=True)
 
 class OrderHandler:
@@ -203,13 +379,11 @@ class OrderHandler:
             user_id = callback.from_user.id
             await state.set_state(ClientOrder.order_type)
             
-            # Сохраняем сессию
-            db.save_user_session(user_id, "order_selection", {"step": "order_type"})
             
             # Надежное редактирование главного сообщения (учет медиа)
             await message_manager.edit_main_message(
                 user_id,
-                text=f"{config.EMOJI['rocket']} <b>Выбор типа проекта</b>\n\n{config.EMOJI['gem']} <b>Что вы хотите заказать?</b>\n\n{config.EMOJI['robot']} <b>Телеграм бот</b> - классический бот с командами и функциями\n\n{config.EMOJI['phone']} <b>Мини-приложение</b> - современное веб-приложение внутри Telegram\n\n{config.EMOJI['info']} <i>Выберите подходящий вариант для вашего проекта</i>",
+                text=f"{config.EMOJI.rocket} <b>Выбор типа проекта</b>\n\n{config.EMOJI.gem} <b>Что вы хотите заказать?</b>\n\n{config.EMOJI.robot} <b>Телеграм бот</b> - классический бот с командами и функциями\n\n{config.EMOJI.phone} <b>Мини-приложение</b> - современное веб-приложение внутри Telegram\n\n{config.EMOJI.info} <i>Выберите подходящий вариант для вашего проекта</i>",
                 message_id=callback.message.message_id,
                 reply_markup=kb.order_type_selection(),
                 bot=callback.bot,
@@ -219,7 +393,7 @@ class OrderHandler:
             await callback.answer()
             
         except Exception as e:
-            logger.error(f"Error starting order: {e}")
+            logger.error("Error starting order: %s", e)
             await callback.answer(config.MESSAGES["error_occurred"], show_alert=True)
 
     @staticmethod
@@ -229,20 +403,17 @@ class OrderHandler:
             user_id = callback.from_user.id
             order_type = "bot" if callback.data == "order_type_bot" else "miniapp"
             
-            await state.update_data(order_type=order_type)
-            await state.set_state(ClientOrder.project_name)
+            await _advance_state(state, ClientOrder.project_name, order_type=order_type)
             
-            # Обновляем сессию
-            db.save_user_session(user_id, "order_bot", {"step": "project_name", "order_type": order_type})
             
             # Определяем тип проекта для отображения
             project_type = "бота" if order_type == "bot" else "мини-приложения"
-            project_emoji = config.EMOJI['robot'] if order_type == "bot" else config.EMOJI['phone']
+            project_emoji = config.EMOJI.robot if order_type == "bot" else config.EMOJI.phone
             
             # Надежное редактирование главного сообщения
             await message_manager.edit_main_message(
                 user_id,
-                text=f"{project_emoji} <b>Заказ разработки {project_type}</b>\n\n{config.EMOJI['pencil']} <i>Шаг 1 из 4</i>\n\n{config.EMOJI['bulb']} <b>Введите название вашего проекта:</b>\n\n{config.EMOJI['info']} <i>Например: \"Интернет-магазин одежды\" или \"Система бронирования\"</i>",
+                text=f"{project_emoji} <b>Заказ разработки {project_type}</b>\n\n{config.EMOJI.pencil} <i>Шаг 1 из 4</i>\n\n{config.EMOJI.bulb} <b>Введите название вашего проекта:</b>\n\n{config.EMOJI.info} <i>Например: \"Интернет-магазин одежды\" или \"Система бронирования\"</i>",
                 message_id=callback.message.message_id,
                 reply_markup=kb.back_button(),
                 bot=callback.bot,
@@ -252,7 +423,7 @@ class OrderHandler:
             await callback.answer()
             
         except Exception as e:
-            logger.error(f"Error selecting order type: {e}")
+            logger.error("Error selecting order type: %s", e)
             await callback.answer(config.MESSAGES["error_occurred"], show_alert=True)
 
     @staticmethod
@@ -271,7 +442,7 @@ class OrderHandler:
             
             if not is_valid:
                 await message.answer(
-                    f"{config.EMOJI['warning']} {validated_name}\n\nПопробуйте еще раз:",
+                    f"{config.EMOJI.warning} {validated_name}\n\nПопробуйте еще раз:",
                     reply_markup=kb.back_button()
                 )
                 return
@@ -279,39 +450,19 @@ class OrderHandler:
             # Получаем тип заказа из состояния
             data = await state.get_data()
             order_type = data.get('order_type', 'bot')
-            
-            # Определяем текст в зависимости от типа
-            if order_type == 'bot':
-                project_type = "бота"
-                project_emoji = config.EMOJI['robot']
-                functionality_text = (
-                    f"{config.EMOJI['check']} Какие функции должен выполнять бот?\n"
-                    f"{config.EMOJI['check']} Какие команды нужны пользователям?\n"
-                    f"{config.EMOJI['check']} Нужны ли интеграции с внешними сервисами?\n"
-                    f"{config.EMOJI['check']} Особые требования к функционалу?"
-                )
-            else:
-                project_type = "мини-приложения"
-                project_emoji = config.EMOJI['phone']
-                functionality_text = (
-                    f"{config.EMOJI['check']} Какие страницы и разделы нужны?\n"
-                    f"{config.EMOJI['check']} Какой функционал должен быть в приложении?\n"
-                    f"{config.EMOJI['check']} Нужна ли авторизация и личные данные?\n"
-                    f"{config.EMOJI['check']} Интеграции с API и внешними сервисами?"
-                )
-            
+
+            # Текст шага полностью статичен — выбираем готовый шаблон
+            prompt = _FUNCTIONALITY_PROMPT_BOT if order_type == 'bot' else _FUNCTIONALITY_PROMPT_MINIAPP
+
             sent = await message.answer(
-                f"{project_emoji} <b>Функционал {project_type}</b>\n\n{config.EMOJI['pencil']} <i>Шаг 2 из 4</i>\n\n{config.EMOJI['tools']} <b>Опишите желаемый функционал:</b>\n\n"
-                f"{functionality_text}\n\n"
-                f"{config.EMOJI['bulb']} <i>Чем подробнее описание, тем точнее будет оценка!</i>",
-                reply_markup=kb.back_button(),
-                parse_mode="HTML"
+                prompt,
+                reply_markup=kb.back_button()
             )
             
             message_manager.set_last_question(user_id, sent.message_id)
             
         except Exception as e:
-            logger.error(f"Error processing project name: {e}")
+            logger.error("Error processing project name: %s", e)
             await message.answer(config.MESSAGES["error_occurred"])
 
     @staticmethod
@@ -319,26 +470,22 @@ class OrderHandler:
         """Обработка функционала"""
         try:
             user_id = message.from_user.id
-            await state.update_data(functionality=message.text)
-            await state.set_state(ClientOrder.deadlines)
+            await _advance_state(state, ClientOrder.deadlines, functionality=message.text)
             
-            # Обновляем сессию
-            db.save_user_session(user_id, "order_bot", {"step": "deadlines"})
             
             sent = await message.answer(
-                f"{config.EMOJI['calendar']} <b>Сроки разработки</b>\n\n{config.EMOJI['pencil']} <i>Шаг 3 из 4</i>\n\n{config.EMOJI['time']} <b>Укажите желаемые сроки:</b>\n\n"
-                f"{config.EMOJI['target']} Когда нужен готовый проект?\n"
-                f"{config.EMOJI['chart']} Есть ли промежуточные этапы?\n"
-                f"{config.EMOJI['lightning']} Насколько срочен проект?\n\n"
-                f"{config.EMOJI['info']} <i>Обычно разработка занимает от 1 до 4 недель</i>",
-                reply_markup=kb.back_button(),
-                parse_mode="HTML"
+                f"{config.EMOJI.calendar} <b>Сроки разработки</b>\n\n{config.EMOJI.pencil} <i>Шаг 3 из 4</i>\n\n{config.EMOJI.time} <b>Укажите желаемые сроки:</b>\n\n"
+                f"{config.EMOJI.target} Когда нужен готовый проект?\n"
+                f"{config.EMOJI.chart} Есть ли промежуточные этапы?\n"
+                f"{config.EMOJI.lightning} Насколько срочен проект?\n\n"
+                f"{config.EMOJI.info} <i>Обычно разработка занимает от 1 до 4 недель</i>",
+                reply_markup=kb.back_button()
             )
             
             message_manager.set_last_question(user_id, sent.message_id)
             
         except Exception as e:
-            logger.error(f"Error processing functionality: {e}")
+            logger.error("Error processing functionality: %s", e)
             await message.answer(config.MESSAGES["error_occurred"])
 
     @staticmethod
@@ -346,26 +493,22 @@ class OrderHandler:
         """Обработка сроков"""
         try:
             user_id = message.from_user.id
-            await state.update_data(deadlines=message.text)
-            await state.set_state(ClientOrder.budget)
+            await _advance_state(state, ClientOrder.budget, deadlines=message.text)
             
-            # Обновляем сессию
-            db.save_user_session(user_id, "order_bot", {"step": "budget"})
             
             sent = await message.answer(
-                f"{config.EMOJI['money']} <b>Бюджет проекта</b>\n\n{config.EMOJI['pencil']} <i>Шаг 4 из 4</i>\n\n{config.EMOJI['gem']} <b>Укажите ваш бюджет:</b>\n\n"
-                f"{config.EMOJI['chart']} Общая стоимость проекта\n"
-                f"{config.EMOJI['handshake']} Возможность поэтапной оплаты\n"
-                f"{config.EMOJI['tools']} Дополнительные расходы (хостинг, домены)\n\n"
-                f"{config.EMOJI['bulb']} <i>Стоимость ботов обычно от 15,000₽ до 100,000₽</i>",
-                reply_markup=kb.back_button(),
-                parse_mode="HTML"
+                f"{config.EMOJI.money} <b>Бюджет проекта</b>\n\n{config.EMOJI.pencil} <i>Шаг 4 из 4</i>\n\n{config.EMOJI.gem} <b>Укажите ваш бюджет:</b>\n\n"
+                f"{config.EMOJI.chart} Общая стоимость проекта\n"
+                f"{config.EMOJI.handshake} Возможность поэтапной оплаты\n"
+                f"{config.EMOJI.tools} Дополнительные расходы (хостинг, домены)\n\n"
+                f"{config.EMOJI.bulb} <i>Стоимость ботов обычно от 15,000₽ до 100,000₽</i>",
+                reply_markup=kb.back_button()
             )
             
             message_manager.set_last_question(user_id, sent.message_id)
             
         except Exception as e:
-            logger.error(f"Error processing deadlines: {e}")
+            logger.error("Error processing deadlines: %s", e)
             await message.answer(config.MESSAGES["error_occurred"])
 
     @staticmethod
@@ -407,13 +550,12 @@ class OrderHandler:
                 success_msg = await bot.send_message(
                     user_id,
                     f"{config.MESSAGES['order_success']}\n\n"
-                    f"{config.EMOJI['document']} <b>Детали заявки:</b>\n\n"
-                    f"{config.EMOJI['rocket']} <b>Проект:</b> {data['project_name']}\n"
-                    f"{config.EMOJI['money']} <b>Бюджет:</b> {data['budget']}\n"
-                    f"{config.EMOJI['calendar']} <b>Сроки:</b> {data['deadlines']}\n\n"
-                    f"{config.EMOJI['phone']} <i>Мы свяжемся с вами в ближайшее время!</i>",
-                    reply_markup=kb.success_action(),
-                    parse_mode="HTML"
+                    f"{config.EMOJI.document} <b>Детали заявки:</b>\n\n"
+                    f"{config.EMOJI.rocket} <b>Проект:</b> {data['project_name']}\n"
+                    f"{config.EMOJI.money} <b>Бюджет:</b> {data['budget']}\n"
+                    f"{config.EMOJI.calendar} <b>Сроки:</b> {data['deadlines']}\n\n"
+                    f"{config.EMOJI.phone} <i>Мы свяжемся с вами в ближайшее время!</i>",
+                    reply_markup=kb.success_action()
                 )
                 
                 message_manager.set_success_message(user_id, success_msg.message_id)
@@ -443,25 +585,24 @@ class OrderHandler:
                                 try:
                                     await bot.send_message(
                                         referral_user.referred_by,
-                                        f"{config.EMOJI['money']} <b>Новое начисление!</b>\n\n"
+                                        f"{config.EMOJI.money} <b>Новое начисление!</b>\n\n"
                                         f"Ваш реферал @{message.from_user.username} оформил заказ.\n"
                                         f"Начислено: {earning.earned_amount:.2f}₽\n\n"
-                                        f"{config.EMOJI['pending']} Статус: Ожидает оплаты\n"
-                                        f"{config.EMOJI['info']} После подтверждения оплаты средства будут доступны к выводу",
-                                        parse_mode="HTML"
+                                        f"{config.EMOJI.pending} Статус: Ожидает оплаты\n"
+                                        f"{config.EMOJI.info} После подтверждения оплаты средства будут доступны к выводу"
                                     )
                                 except Exception as e:
-                                    logger.error(f"Error notifying referrer: {e}")
+                                    logger.error("Error notifying referrer: %s", e)
                     except Exception as e:
-                        logger.error(f"Error processing referral earning: {e}")
+                        logger.error("Error processing referral earning: %s", e)
             
             # Очищаем состояние и сессию
             await state.clear()
             db.delete_user_session(user_id)
             
-            logger.info(f"Order created successfully for user {user_id}")
+            logger.info("Order created successfully for user %s", user_id)
         except Exception as e:
-            logger.error(f"Error processing budget: {e}")
+            logger.error("Error processing budget: %s", e)
             await message.answer(config.MESSAGES["error_occurred"])
 
 class TeamHandler:
@@ -474,13 +615,11 @@ class TeamHandler:
             user_id = callback.from_user.id
             await state.set_state(JoinTeam.full_name)
             
-            # Сохраняем сессию
-            db.save_user_session(user_id, "join_team", {"step": "full_name"})
             
             # Надежное редактирование главного сообщения (учет медиа)
             await message_manager.edit_main_message(
                 user_id,
-                text=f"{config.EMOJI['handshake']} <b>Присоединение к команде Codif</b>\n\n{config.EMOJI['pencil']} <i>Шаг 1 из 6</i>\n\n{config.EMOJI['star']} <b>Введите ваше имя и фамилию:</b>\n\n{config.EMOJI['info']} <i>Например: Иван Петров</i>",
+                text=f"{config.EMOJI.handshake} <b>Присоединение к команде Codif</b>\n\n{config.EMOJI.pencil} <i>Шаг 1 из 6</i>\n\n{config.EMOJI.star} <b>Введите ваше имя и фамилию:</b>\n\n{config.EMOJI.info} <i>Например: Иван Петров</i>",
                 message_id=callback.message.message_id,
                 reply_markup=kb.back_button(),
                 bot=callback.bot,
@@ -490,7 +629,7 @@ class TeamHandler:
             await callback.answer()
             
         except Exception as e:
-            logger.error(f"Error starting join team: {e}")
+            logger.error("Error starting join team: %s", e)
             await callback.answer(config.MESSAGES["error_occurred"], show_alert=True)
 
     @staticmethod
@@ -498,22 +637,18 @@ class TeamHandler:
         """Обработка ФИО"""
         try:
             user_id = message.from_user.id
-            await state.update_data(full_name=message.text)
-            await state.set_state(JoinTeam.age)
+            await _advance_state(state, JoinTeam.age, full_name=message.text)
             
-            # Обновляем сессию
-            db.save_user_session(user_id, "join_team", {"step": "age"})
             
             sent = await message.answer(
-                f"{config.EMOJI['calendar']} <b>Возраст</b>\n\n{config.EMOJI['pencil']} <i>Шаг 2 из 6</i>\n\n{config.EMOJI['time']} <b>Введите ваш возраст:</b>\n\n{config.EMOJI['info']} <i>Укажите полных лет</i>",
-                reply_markup=kb.back_button(),
-                parse_mode="HTML"
+                f"{config.EMOJI.calendar} <b>Возраст</b>\n\n{config.EMOJI.pencil} <i>Шаг 2 из 6</i>\n\n{config.EMOJI.time} <b>Введите ваш возраст:</b>\n\n{config.EMOJI.info} <i>Укажите полных лет</i>",
+                reply_markup=kb.back_button()
             )
             
             message_manager.set_last_question(user_id, sent.message_id)
             
         except Exception as e:
-            logger.error(f"Error processing full name: {e}")
+            logger.error("Error processing full name: %s", e)
             await message.answer(config.MESSAGES["error_occurred"])
 
     @staticmethod
@@ -521,27 +656,23 @@ class TeamHandler:
         """Обработка возраста"""
         try:
             user_id = message.from_user.id
-            await state.update_data(age=message.text)
-            await state.set_state(JoinTeam.experience)
+            await _advance_state(state, JoinTeam.experience, age=message.text)
             
-            # Обновляем сессию
-            db.save_user_session(user_id, "join_team", {"step": "experience"})
             
             sent = await message.answer(
-                f"{config.EMOJI['trophy']} <b>Опыт работы</b>\n\n{config.EMOJI['pencil']} <i>Шаг 3 из 6</i>\n\n{config.EMOJI['chart']} <b>Расскажите о вашем опыте:</b>\n\n"
-                f"{config.EMOJI['check']} Сколько лет в разработке?\n"
-                f"{config.EMOJI['check']} Какие проекты реализовали?\n"
-                f"{config.EMOJI['check']} Опыт работы в команде?\n"
-                f"{config.EMOJI['check']} Участие в крупных проектах?\n\n"
-                f"{config.EMOJI['bulb']} <i>Чем подробнее, тем лучше мы поймем ваш уровень!</i>",
-                reply_markup=kb.back_button(),
-                parse_mode="HTML"
+                f"{config.EMOJI.trophy} <b>Опыт работы</b>\n\n{config.EMOJI.pencil} <i>Шаг 3 из 6</i>\n\n{config.EMOJI.chart} <b>Расскажите о вашем опыте:</b>\n\n"
+                f"{config.EMOJI.check} Сколько лет в разработке?\n"
+                f"{config.EMOJI.check} Какие проекты реализовали?\n"
+                f"{config.EMOJI.check} Опыт работы в команде?\n"
+                f"{config.EMOJI.check} Участие в крупных проектах?\n\n"
+                f"{config.EMOJI.bulb} <i>Чем подробнее, тем лучше мы поймем ваш уровень!</i>",
+                reply_markup=kb.back_button()
             )
             
             message_manager.set_last_question(user_id, sent.message_id)
             
         except Exception as e:
-            logger.error(f"Error processing age: {e}")
+            logger.error("Error processing age: %s", e)
             await message.answer(config.MESSAGES["error_occurred"])
 
     @staticmethod
@@ -549,28 +680,24 @@ class TeamHandler:
         """Обработка опыта работы"""
         try:
             user_id = message.from_user.id
-            await state.update_data(experience=message.text)
-            await state.set_state(JoinTeam.stack)
+            await _advance_state(state, JoinTeam.stack, experience=message.text)
             
-            # Обновляем сессию
-            db.save_user_session(user_id, "join_team", {"step": "stack"})
             
             sent = await message.answer(
-                f"{config.EMOJI['computer']} <b>Технологический стек</b>\n\n{config.EMOJI['pencil']} <i>Шаг 4 из 6</i>\n\n{config.EMOJI['tools']} <b>Перечислите ваши технологии:</b>\n\n"
-                f"{config.EMOJI['gear']} Языки программирования\n"
-                f"{config.EMOJI['wrench']} Фреймворки и библиотеки\n"
-                f"{config.EMOJI['hammer']} Инструменты разработки\n"
-                f"{config.EMOJI['folder']} Базы данных\n"
-                f"{config.EMOJI['cloud']} Облачные платформы\n\n"
-                f"{config.EMOJI['info']} <i>Укажите уровень владения каждой технологией</i>",
-                reply_markup=kb.back_button(),
-                parse_mode="HTML"
+                f"{config.EMOJI.computer} <b>Технологический стек</b>\n\n{config.EMOJI.pencil} <i>Шаг 4 из 6</i>\n\n{config.EMOJI.tools} <b>Перечислите ваши технологии:</b>\n\n"
+                f"{config.EMOJI.gear} Языки программирования\n"
+                f"{config.EMOJI.wrench} Фреймворки и библиотеки\n"
+                f"{config.EMOJI.hammer} Инструменты разработки\n"
+                f"{config.EMOJI.folder} Базы данных\n"
+                f"{config.EMOJI.cloud} Облачные платформы\n\n"
+                f"{config.EMOJI.info} <i>Укажите уровень владения каждой технологией</i>",
+                reply_markup=kb.back_button()
             )
             
             message_manager.set_last_question(user_id, sent.message_id)
             
         except Exception as e:
-            logger.error(f"Error processing experience: {e}")
+            logger.error("Error processing experience: %s", e)
             await message.answer(config.MESSAGES["error_occurred"])
 
     @staticmethod
@@ -578,27 +705,23 @@ class TeamHandler:
         """Обработка стека технологий"""
         try:
             user_id = message.from_user.id
-            await state.update_data(stack=message.text)
-            await state.set_state(JoinTeam.about)
+            await _advance_state(state, JoinTeam.about, stack=message.text)
             
-            # Обновляем сессию
-            db.save_user_session(user_id, "join_team", {"step": "about"})
             
             sent = await message.answer(
-                f"{config.EMOJI['heart']} <b>О себе</b>\n\n{config.EMOJI['pencil']} <i>Шаг 5 из 6</i>\n\n{config.EMOJI['sparkles']} <b>Расскажите о себе:</b>\n\n"
-                f"{config.EMOJI['star']} Ваши сильные стороны\n"
-                f"{config.EMOJI['target']} Интересы в разработке\n"
-                f"{config.EMOJI['rocket']} Цели и амбиции\n"
-                f"{config.EMOJI['gem']} Что вас мотивирует?\n\n"
-                f"{config.EMOJI['bulb']} <i>Помогите нам узнать вас лучше!</i>",
-                reply_markup=kb.back_button(),
-                parse_mode="HTML"
+                f"{config.EMOJI.heart} <b>О себе</b>\n\n{config.EMOJI.pencil} <i>Шаг 5 из 6</i>\n\n{config.EMOJI.sparkles} <b>Расскажите о себе:</b>\n\n"
+                f"{config.EMOJI.star} Ваши сильные стороны\n"
+                f"{config.EMOJI.target} Интересы в разработке\n"
+                f"{config.EMOJI.rocket} Цели и амбиции\n"
+                f"{config.EMOJI.gem} Что вас мотивирует?\n\n"
+                f"{config.EMOJI.bulb} <i>Помогите нам узнать вас лучше!</i>",
+                reply_markup=kb.back_button()
             )
             
             message_manager.set_last_question(user_id, sent.message_id)
             
         except Exception as e:
-            logger.error(f"Error processing stack: {e}")
+            logger.error("Error processing stack: %s", e)
             await message.answer(config.MESSAGES["error_occurred"])
 
     @staticmethod
@@ -606,27 +729,23 @@ class TeamHandler:
         """Обработка информации о себе"""
         try:
             user_id = message.from_user.id
-            await state.update_data(about=message.text)
-            await state.set_state(JoinTeam.motivation)
+            await _advance_state(state, JoinTeam.motivation, about=message.text)
             
-            # Обновляем сессию
-            db.save_user_session(user_id, "join_team", {"step": "motivation"})
             
             sent = await message.answer(
-                f"{config.EMOJI['fire']} <b>Мотивация</b>\n\n{config.EMOJI['pencil']} <i>Шаг 6 из 6</i>\n\n{config.EMOJI['lightning']} <b>Почему именно Codif?</b>\n\n"
-                f"{config.EMOJI['heart']} Что вас привлекает в нашей команде?\n"
-                f"{config.EMOJI['crystal']} Какие возможности видите для себя?\n"
-                f"{config.EMOJI['trophy']} Ваши ожидания от работы?\n"
-                f"{config.EMOJI['handshake']} Как планируете развиваться с нами?\n\n"
-                f"{config.EMOJI['sparkles']} <i>Последний шаг - расскажите о своих планах!</i>",
-                reply_markup=kb.back_button(),
-                parse_mode="HTML"
+                f"{config.EMOJI.fire} <b>Мотивация</b>\n\n{config.EMOJI.pencil} <i>Шаг 6 из 6</i>\n\n{config.EMOJI.lightning} <b>Почему именно Codif?</b>\n\n"
+                f"{config.EMOJI.heart} Что вас привлекает в нашей команде?\n"
+                f"{config.EMOJI.crystal} Какие возможности видите для себя?\n"
+                f"{config.EMOJI.trophy} Ваши ожидания от работы?\n"
+                f"{config.EMOJI.handshake} Как планируете развиваться с нами?\n\n"
+                f"{config.EMOJI.sparkles} <i>Последний шаг - расскажите о своих планах!</i>",
+                reply_markup=kb.back_button()
             )
             
             message_manager.set_last_question(user_id, sent.message_id)
             
         except Exception as e:
-            logger.error(f"Error processing about: {e}")
+            logger.error("Error processing about: %s", e)
             await message.answer(config.MESSAGES["error_occurred"])
 
     @staticmethod
@@ -634,30 +753,18 @@ class TeamHandler:
         """Обработка мотивации"""
         try:
             user_id = message.from_user.id
-            await state.update_data(motivation=message.text)
-            await state.set_state(JoinTeam.role)
+            await _advance_state(state, JoinTeam.role, motivation=message.text)
             
-            # Обновляем сессию
-            db.save_user_session(user_id, "join_team", {"step": "role"})
             
             sent = await message.answer(
-                f"{config.EMOJI['gear']} <b>Специализация</b>\n\n{config.EMOJI['pencil']} <i>Финальный шаг</i>\n\n{config.EMOJI['target']} <b>Выберите направление:</b>\n\n"
-                f"{config.EMOJI['computer']} Frontend/Backend разработка\n"
-                f"{config.EMOJI['phone']} Мобильная разработка\n"
-                f"{config.EMOJI['cloud']} DevOps/Системная администрация\n"
-                f"{config.EMOJI['art']} UI/UX дизайн\n"
-                f"{config.EMOJI['shield']} Тестирование и QA\n"
-                f"{config.EMOJI['rocket']} Product Management\n"
-                f"{config.EMOJI['bulb']} Другое направление\n\n"
-                f"{config.EMOJI['info']} <i>Можете указать несколько направлений</i>",
-                reply_markup=kb.back_button(),
-                parse_mode="HTML"
+                _SPECIALIZATION_PROMPT,
+                reply_markup=kb.back_button()
             )
             
             message_manager.set_last_question(user_id, sent.message_id)
             
         except Exception as e:
-            logger.error(f"Error processing motivation: {e}")
+            logger.error("Error processing motivation: %s", e)
             await message.answer(config.MESSAGES["error_occurred"])
 
     @staticmethod
@@ -665,8 +772,8 @@ class TeamHandler:
         """Обработка роли и сохранение анкеты"""
         try:
             user_id = message.from_user.id
-            await state.update_data(role=message.text)
-            data = await state.get_data()
+            # update_data возвращает уже слитый dict — без второго похода в storage
+            data = await state.update_data(role=message.text)
             
             # Сохраняем анкету в БД
             app_data = {
@@ -681,44 +788,41 @@ class TeamHandler:
                 "role": data["role"]
             }
             
-            application = db.create_team_application(app_data)
-            
-            if application:
-                # Уведомляем админов
-                await notification_manager.notify_admins(
-                    f"👥 <b>Новая заявка в команду!</b>\n\n"
-                    f"👤 Пользователь: @{message.from_user.username}\n"
-                    f"🆔 ID: {user_id}\n"
-                    f"📝 Имя: {data['full_name']}\n"
-                    f"🎭 Роль: {data['role']}\n"
-                    f"💼 Опыт: {data['experience'][:50]}...",
-                    bot
-                )
-                
-                # Отправляем сообщение об успехе
-                success_msg = await bot.send_message(
-                    user_id,
-                    f"{config.MESSAGES['application_success']}\n\n"
-                    f"📋 <b>Детали заявки:</b>\n"
-                    f"• Имя: {data['full_name']}\n"
-                    f"• Роль: {data['role']}\n"
-                    f"• Опыт: {data['experience'][:50]}...",
-                    reply_markup=kb.success_action(),
-                    parse_mode="HTML"
-                )
-                
-                message_manager.set_success_message(user_id, success_msg.message_id)
-                
-                # Очищаем состояние и сессию
-                await state.clear()
-                db.delete_user_session(user_id)
-                
-                logger.info(f"Team application created successfully for user {user_id}")
-            else:
-                await message.answer(config.MESSAGES["error_occurred"])
-                
+            # Отвечаем пользователю сразу; INSERT и уведомление админов
+            # уходят в фоновую очередь
+            success_msg = await bot.send_message(
+                user_id,
+                f"{config.MESSAGES['application_success']}\n\n"
+                f"📋 <b>Детали заявки:</b>\n"
+                f"• Имя: {data['full_name']}\n"
+                f"• Роль: {data['role']}\n"
+                f"• Опыт: {data['experience'][:50]}...",
+                reply_markup=kb.success_action()
+            )
+
+            message_manager.set_success_message(user_id, success_msg.message_id)
+            await state.clear()
+
+            _enqueue_background(
+                "team_app",
+                {
+                    "data": app_data,
+                    "admin_text": (
+                        f"👥 <b>Новая заявка в команду!</b>\n\n"
+                        f"👤 Пользователь: @{message.from_user.username}\n"
+                        f"🆔 ID: {user_id}\n"
+                        f"📝 Имя: {data['full_name']}\n"
+                        f"🎭 Роль: {data['role']}\n"
+                        f"💼 Опыт: {data['experience'][:50]}..."
+                    ),
+                },
+                bot,
+            )
+
+            logger.info("Team application queued for user %s", user_id)
+
         except Exception as e:
-            logger.error(f"Error processing role: {e}")
+            logger.error("Error processing role: %s", e)
             await message.answer(config.MESSAGES["error_occurred"])
 
 class ConsultationHandler:
@@ -731,13 +835,11 @@ class ConsultationHandler:
             user_id = callback.from_user.id
             await state.set_state(Consultation.question)
             
-            # Сохраняем сессию
-            db.save_user_session(user_id, "consultation", {"step": "question"})
 
             # Надежное редактирование главного сообщения (учитывает медиа)
             await message_manager.edit_main_message(
                 user_id,
-                text="💬 <b>Консультация</b>\n\nОпишите ваш вопрос подробно:",
+                text=_CONSULTATION_PROMPT,
                 message_id=callback.message.message_id,
                 reply_markup=kb.back_button(),
                 bot=callback.bot,
@@ -748,7 +850,7 @@ class ConsultationHandler:
             await callback.answer()
             
         except Exception as e:
-            logger.error(f"Error starting consultation: {e}")
+            logger.error("Error starting consultation: %s", e)
             await callback.answer(config.MESSAGES["error_occurred"], show_alert=True)
 
     @staticmethod
@@ -765,39 +867,36 @@ class ConsultationHandler:
                 "question": question
             }
             
-            request = db.create_consultation_request(req_data)
-            
-            if request:
-                # Уведомляем админов
-                await notification_manager.notify_admins(
-                    f"💬 <b>Новый запрос на консультацию!</b>\n\n"
-                    f"👤 Пользователь: @{message.from_user.username}\n"
-                    f"🆔 ID: {user_id}\n"
-                    f"❓ Вопрос: {question[:100]}...",
-                    bot
-                )
-                
-                # Отправляем сообщение об успехе
-                success_msg = await bot.send_message(
-                    user_id,
-                    f"{config.MESSAGES['consultation_success']}\n\n"
-                    f"📝 <b>Ваш вопрос:</b>\n{question[:200]}...",
-                    reply_markup=kb.success_action(),
-                    parse_mode="HTML"
-                )
-                
-                message_manager.set_success_message(user_id, success_msg.message_id)
-                
-                # Очищаем состояние и сессию
-                await state.clear()
-                db.delete_user_session(user_id)
-                
-                logger.info(f"Consultation request created successfully for user {user_id}")
-            else:
-                await message.answer(config.MESSAGES["error_occurred"])
-                
+            # Отвечаем пользователю сразу; INSERT и уведомление админов
+            # уходят в фоновую очередь
+            success_msg = await bot.send_message(
+                user_id,
+                f"{config.MESSAGES['consultation_success']}\n\n"
+                f"📝 <b>Ваш вопрос:</b>\n{question[:200]}...",
+                reply_markup=kb.success_action()
+            )
+
+            message_manager.set_success_message(user_id, success_msg.message_id)
+            await state.clear()
+
+            _enqueue_background(
+                "consultation",
+                {
+                    "data": req_data,
+                    "admin_text": (
+                        f"💬 <b>Новый запрос на консультацию!</b>\n\n"
+                        f"👤 Пользователь: @{message.from_user.username}\n"
+                        f"🆔 ID: {user_id}\n"
+                        f"❓ Вопрос: {question[:100]}..."
+                    ),
+                },
+                bot,
+            )
+
+            logger.info("Consultation request queued for user %s", user_id)
+
         except Exception as e:
-            logger.error(f"Error processing question: {e}")
+            logger.error("Error processing question: %s", e)
             await message.answer(config.MESSAGES["error_occurred"])
 
 class PortfolioHandler:
@@ -811,67 +910,46 @@ class PortfolioHandler:
             await state.set_state(Portfolio.viewing)
             
             # Получаем проекты из БД
-            projects = db.get_portfolio_projects()
+            projects = await _cached_projects()
             
             if projects:
-                await PortfolioHandler.show_project(user_id, 0, len(projects), bot)
+                await PortfolioHandler.show_project(user_id, 0, len(projects), bot, projects=projects)
             else:
                 await callback.answer(config.MESSAGES["no_portfolio"], show_alert=True)
                 
             await callback.answer()
             
         except Exception as e:
-            logger.error(f"Error starting portfolio: {e}")
+            logger.error("Error starting portfolio: %s", e)
             await callback.answer(config.MESSAGES["error_occurred"], show_alert=True)
 
     @staticmethod
-    async def show_project(user_id: int, project_index: int, total: int, bot: Bot) -> None:
+    async def show_project(user_id: int, project_index: int, total: int, bot: Bot, projects=None) -> None:
         """Отображение проекта портфолио"""
         try:
-            projects = db.get_portfolio_projects()
+            # Список передается вызывающим кодом, чтобы не ходить в кэш дважды
+            if projects is None:
+                projects = await _cached_projects()
             if not projects or project_index >= len(projects):
                 return
                 
-            project = projects[project_index]
-            
-            # Красивое форматирование карточки проекта
-            try:
-                cost_str = f"{int(project.cost):,}".replace(",", " ")
-            except Exception:
-                cost_str = str(getattr(project, "cost", "—"))
-
-            parts = [
-                f"📌 <b>{project.title}</b>",
-                "────────────",
-                f"📝 <i>{project.description}</i>",
-            ]
-
-            if getattr(project, "duration", None):
-                parts.append(f"⏱️ <b>Длительность разработки:</b> {project.duration}")
-
-            parts.extend([
-                f"💰 <b>Стоимость:</b> {cost_str} ₽",
-                "────────────",
-                f"📊 Проект {project_index + 1} из {total}",
-            ])
+            # Карточка собрана заранее в _PortfolioCard — только рендер
+            card = projects[project_index]
+            text = card.text_viewing
+            emoji_entities = card.entities_viewing
 
-            text = "\n".join(parts)
-            
             markup = kb.portfolio_navigation(
                 project_index,
                 total,
-                bot_url=getattr(project, 'bot_url', None)
+                bot_url=card.bot_url
             )
 
-            # Поддержка premium эмодзи через entities
-            emoji_entities = MessageManager.build_custom_emoji_entities(text, config.EMOJI_CUSTOM)
-
             # Показываем видео если есть, иначе текст
-            if getattr(project, 'video_url', None):
+            if card.video_url:
                 shown = await message_manager.show_main_video(
                     user_id,
                     caption=text,
-                    video_url=project.video_url,
+                    video_url=card.video_url,
                     reply_markup=markup,
                     bot=bot,
                     caption_entities=emoji_entities if emoji_entities else None,
@@ -894,87 +972,69 @@ class PortfolioHandler:
                 )
             
         except Exception as e:
-            logger.error(f"Error showing project: {e}")
+            logger.error("Error showing project: %s", e)
 
     @staticmethod
-    async def portfolio_prev(callback: types.CallbackQuery, bot: Bot) -> None:
+    async def portfolio_prev(callback: types.CallbackQuery, callback_data: PortfolioNav, bot: Bot) -> None:
         """Переход к предыдущему проекту"""
         try:
-            current_index = int(callback.data.split("_")[2])
-            projects = db.get_portfolio_projects()
+            current_index = callback_data.idx
+            projects = await _cached_projects()
             
             if projects:
                 new_index = (current_index - 1) % len(projects)
-                await PortfolioHandler.show_project(callback.from_user.id, new_index, len(projects), bot)
+                await PortfolioHandler.show_project(callback.from_user.id, new_index, len(projects), bot, projects=projects)
                 
             await callback.answer()
             
         except Exception as e:
-            logger.error(f"Error in portfolio_prev: {e}")
+            logger.error("Error in portfolio_prev: %s", e)
             await callback.answer(config.MESSAGES["error_occurred"], show_alert=True)
 
     @staticmethod
-    async def portfolio_next(callback: types.CallbackQuery, bot: Bot) -> None:
+    async def portfolio_next(callback: types.CallbackQuery, callback_data: PortfolioNav, bot: Bot) -> None:
         """Переход к следующему проекту"""
         try:
-            current_index = int(callback.data.split("_")[2])
-            projects = db.get_portfolio_projects()
+            current_index = callback_data.idx
+            projects = await _cached_projects()
             
             if projects:
                 new_index = (current_index + 1) % len(projects)
-                await PortfolioHandler.show_project(callback.from_user.id, new_index, len(projects), bot)
+                await PortfolioHandler.show_project(callback.from_user.id, new_index, len(projects), bot, projects=projects)
                 
             await callback.answer()
             
         except Exception as e:
-            logger.error(f"Error in portfolio_next: {e}")
+            logger.error("Error in portfolio_next: %s", e)
             await callback.answer(config.MESSAGES["error_occurred"], show_alert=True)
 
     @staticmethod
-    async def portfolio_details(callback: types.CallbackQuery, state: FSMContext, bot: Bot) -> None:
+    async def portfolio_details(callback: types.CallbackQuery, callback_data: PortfolioNav, state: FSMContext, bot: Bot) -> None:
         """Просмотр деталей проекта"""
         try:
-            project_index = int(callback.data.split("_")[2])
-            projects = db.get_portfolio_projects()
+            project_index = callback_data.idx
+            projects = await _cached_projects()
             
             if projects and project_index < len(projects):
-                project = projects[project_index]
+                card = projects[project_index]
                 await state.set_state(Portfolio.details)
                 await state.update_data(current_index=project_index)
-                
-                try:
-                    cost_str = f"{int(project.cost):,}".replace(",", " ")
-                except Exception:
-                    cost_str = str(getattr(project, "cost", "—"))
-
-                parts = [
-                    f"📌 <b>{project.title}</b>",
-                    "────────────",
-                    f"📋 <b>Описание:</b>\n{project.details}",
-                ]
-                if getattr(project, "duration", None):
-                    parts.append(f"⏱️ <b>Длительность разработки:</b> {project.duration}")
-                parts.extend([
-                    f"💰 <b>Стоимость:</b> {cost_str} ₽",
-                    "────────────",
-                    f"📊 Проект {project_index + 1} из {len(projects)}",
-                ])
-                text = "\n".join(parts)
 
-                # entities для premium эмодзи
-                emoji_entities = MessageManager.build_custom_emoji_entities(text, config.EMOJI_CUSTOM)
-                
+                # Карточка собрана заранее в _PortfolioCard — только рендер
+                text = card.text_details
+                emoji_entities = card.entities_details
+
                 markup = kb.portfolio_navigation(
                     project_index,
                     len(projects),
                     show_details=True,
-                    bot_url=getattr(project, 'bot_url', None),
+                    bot_url=card.bot_url,
                 )
-                if getattr(project, 'video_url', None):
+                if card.video_url:
                     shown = await message_manager.show_main_video(
                         callback.from_user.id,
                         caption=text,
-                        video_url=project.video_url,
+                        video_url=card.video_url,
                         reply_markup=markup,
                         bot=bot,
                         caption_entities=emoji_entities if emoji_entities else None,
@@ -999,165 +1059,74 @@ class PortfolioHandler:
             await callback.answer()
             
         except Exception as e:
-            logger.error(f"Error in portfolio_details: {e}")
+            logger.error("Error in portfolio_details: %s", e)
             await callback.answer(config.MESSAGES["error_occurred"], show_alert=True)
 
     @staticmethod
-    async def portfolio_back(callback: types.CallbackQuery, state: FSMContext, bot: Bot) -> None:
+    async def portfolio_back(callback: types.CallbackQuery, callback_data: PortfolioNav, state: FSMContext, bot: Bot) -> None:
         """Возврат к списку проектов"""
         try:
-            project_index = int(callback.data.split("_")[2])
+            project_index = callback_data.idx
             await state.set_state(Portfolio.viewing)
             
-            projects = db.get_portfolio_projects()
+            projects = await _cached_projects()
             if projects:
-                await PortfolioHandler.show_project(callback.from_user.id, project_index, len(projects), bot)
+                await PortfolioHandler.show_project(callback.from_user.id, project_index, len(projects), bot, projects=projects)
                 
             await callback.answer()
             
         except Exception as e:
-            logger.error(f"Error in portfolio_back: {e}")
+            logger.error("Error in portfolio_back: %s", e)
             await callback.answer(config.MESSAGES["error_occurred"], show_alert=True)
 
-# Регистрация обработчиков
-@main_router.message(Command("start"))
-async def cmd_start(message: types.Message, state: FSMContext):
-    await MainHandler.start_command(message, state)
-
-@main_router.callback_query(F.data == "back_to_main")
-async def back_to_main(callback: types.CallbackQuery, state: FSMContext, bot: Bot):
-    await MainHandler.back_to_main(callback, state, bot)
-
-@main_router.callback_query(F.data == "cancel_questionnaire")
-async def cancel_questionnaire(callback: types.CallbackQuery, state: FSMContext, bot: Bot):
-    await MainHandler.cancel_questionnaire(callback, state, bot)
+# Регистрация обработчиков: статические методы вешаются на роутер напрямую,
+# без промежуточных функций-обёрток (минус один фрейм на каждый апдейт)
+main_router.message.register(MainHandler.start_command, Command("start"))
+main_router.callback_query.register(MainHandler.back_to_main, F.data == "back_to_main")
+main_router.callback_query.register(MainHandler.cancel_questionnaire, F.data == "cancel_questionnaire")
 
 # Заказы
-@main_router.callback_query(F.data == "order_bot")
-async def start_order_bot(callback: types.CallbackQuery, state: FSMContext):
-    await OrderHandler.start_order(callback, state)
-
-@main_router.callback_query(F.data.startswith("order_type_"))
-async def select_order_type(callback: types.CallbackQuery, state: FSMContext):
-    await OrderHandler.select_order_type(callback, state)
-
-@main_router.message(ClientOrder.project_name)
-async def process_project_name(message: types.Message, state: FSMContext):
-    await OrderHandler.process_project_name(message, state)
-
-@main_router.message(ClientOrder.functionality)
-async def process_functionality(message: types.Message, state: FSMContext):
-    await OrderHandler.process_functionality(message, state)
-
-@main_router.message(ClientOrder.deadlines)
-async def process_deadlines(message: types.Message, state: FSMContext):
-    await OrderHandler.process_deadlines(message, state)
-
-@main_router.message(ClientOrder.budget)
-async def process_budget(message: types.Message, state: FSMContext, bot: Bot):
-    await OrderHandler.process_budget(message, state, bot)
+main_router.callback_query.register(OrderHandler.start_order, F.data == "order_bot")
+main_router.callback_query.register(OrderHandler.select_order_type, F.data.startswith("order_type_"))
+main_router.message.register(OrderHandler.handle_project_name, ClientOrder.project_name)
+main_router.message.register(OrderHandler.process_functionality, ClientOrder.functionality)
+main_router.message.register(OrderHandler.process_deadlines, ClientOrder.deadlines)
+main_router.message.register(OrderHandler.process_budget, ClientOrder.budget)
 
 # Команда
-@main_router.callback_query(F.data == "join_team")
-async def start_join_team(callback: types.CallbackQuery, state: FSMContext):
-    await TeamHandler.start_join_team(callback, state)
-
-@main_router.message(JoinTeam.full_name)
-async def process_full_name(message: types.Message, state: FSMContext):
-    await TeamHandler.process_full_name(message, state)
-
-@main_router.message(JoinTeam.age)
-async def process_age(message: types.Message, state: FSMContext):
-    await TeamHandler.process_age(message, state)
-
-@main_router.message(JoinTeam.experience)
-async def process_experience(message: types.Message, state: FSMContext):
-    await TeamHandler.process_experience(message, state)
-
-@main_router.message(JoinTeam.stack)
-async def process_stack(message: types.Message, state: FSMContext):
-    await TeamHandler.process_stack(message, state)
-
-@main_router.message(JoinTeam.about)
-async def process_about(message: types.Message, state: FSMContext):
-    await TeamHandler.process_about(message, state)
-
-@main_router.message(JoinTeam.motivation)
-async def process_motivation(message: types.Message, state: FSMContext):
-    await TeamHandler.process_motivation(message, state)
-
-@main_router.message(JoinTeam.role)
-async def process_role(message: types.Message, state: FSMContext, bot: Bot):
-    await TeamHandler.process_role(message, state, bot)
+main_router.callback_query.register(TeamHandler.start_join_team, F.data == "join_team")
+main_router.message.register(TeamHandler.process_full_name, JoinTeam.full_name)
+main_router.message.register(TeamHandler.process_age, JoinTeam.age)
+main_router.message.register(TeamHandler.process_experience, JoinTeam.experience)
+main_router.message.register(TeamHandler.process_stack, JoinTeam.stack)
+main_router.message.register(TeamHandler.process_about, JoinTeam.about)
+main_router.message.register(TeamHandler.process_motivation, JoinTeam.motivation)
+main_router.message.register(TeamHandler.process_role, JoinTeam.role)
 
 # Консультации
-@main_router.callback_query(F.data == "consultation")
-async def start_consultation(callback: types.CallbackQuery, state: FSMContext):
-    await ConsultationHandler.start_consultation(callback, state)
-
-@main_router.message(Consultation.question)
-async def process_question(message: types.Message, state: FSMContext, bot: Bot):
-    await ConsultationHandler.process_question(message, state, bot)
+main_router.callback_query.register(ConsultationHandler.start_consultation, F.data == "consultation")
+main_router.message.register(ConsultationHandler.process_question, Consultation.question)
 
 # Портфолио
-@main_router.callback_query(F.data == "portfolio")
-async def start_portfolio(callback: types.CallbackQuery, state: FSMContext, bot: Bot):
-    await PortfolioHandler.start_portfolio(callback, state, bot)
-
-@main_router.callback_query(F.data.startswith("portfolio_prev_"))
-async def portfolio_prev(callback: types.CallbackQuery, bot: Bot):
-    await PortfolioHandler.portfolio_prev(callback, bot)
-
-@main_router.callback_query(F.data.startswith("portfolio_next_"))
-async def portfolio_next(callback: types.CallbackQuery, bot: Bot):
-    await PortfolioHandler.portfolio_next(callback, bot)
-
-@main_router.callback_query(F.data.startswith("portfolio_details_"))
-async def portfolio_details(callback: types.CallbackQuery, state: FSMContext, bot: Bot):
-    await PortfolioHandler.portfolio_details(callback, state, bot)
-
-@main_router.callback_query(F.data.startswith("portfolio_back_"))
-async def portfolio_back(callback: types.CallbackQuery, state: FSMContext, bot: Bot):
-    await PortfolioHandler.portfolio_back(callback, state, bot)
+main_router.callback_query.register(PortfolioHandler.start_portfolio, F.data == "portfolio")
+main_router.callback_query.register(PortfolioHandler.portfolio_prev, PortfolioNav.filter(F.action == "prev"))
+main_router.callback_query.register(PortfolioHandler.portfolio_next, PortfolioNav.filter(F.action == "next"))
+main_router.callback_query.register(PortfolioHandler.portfolio_details, PortfolioNav.filter(F.action == "details"))
+main_router.callback_query.register(PortfolioHandler.portfolio_back, PortfolioNav.filter(F.action == "back"))
 
 # Реферальная система
-@main_router.callback_query(F.data == "referral_system")
-async def start_referral_system(callback: types.CallbackQuery, state: FSMContext):
-    await ReferralHandler.start_referral_system(callback, state)
-
-@main_router.callback_query(F.data == "referral_stats")
-async def show_referral_stats(callback: types.CallbackQuery, state: FSMContext):
-    await ReferralHandler.show_referral_stats(callback, state)
-
-@main_router.callback_query(F.data == "referral_link")
-async def show_referral_link(callback: types.CallbackQuery, state: FSMContext):
-    await ReferralHandler.show_referral_link(callback, state)
-
-@main_router.callback_query(F.data == "referral_setup_wallet")
-async def setup_wallet_start(callback: types.CallbackQuery, state: FSMContext):
-    await ReferralHandler.setup_wallet_start(callback, state)
-
-@main_router.callback_query(F.data.startswith("wallet_method_"))
-async def select_wallet_method(callback: types.CallbackQuery, state: FSMContext):
-    await ReferralHandler.select_wallet_method(callback, state)
-
-@main_router.message(ReferralSystem.enter_wallet)
-async def process_wallet_info(message: types.Message, state: FSMContext):
-    await ReferralHandler.process_wallet_info(message, state)
-
-@main_router.message(ReferralSystem.setup_wallet)
-async def process_full_name(message: types.Message, state: FSMContext):
-    await ReferralHandler.process_full_name(message, state)
-
-@main_router.callback_query(F.data == "referral_earnings")
-async def show_earnings(callback: types.CallbackQuery, state: FSMContext):
-    await ReferralHandler.show_earnings(callback, state)
-
-@main_router.callback_query(F.data == "request_payout")
-async def request_payout(callback: types.CallbackQuery, state: FSMContext):
-    await ReferralHandler.request_payout(callback, state)
+main_router.callback_query.register(ReferralHandler.start_referral_system, F.data == "referral_system")
+main_router.callback_query.register(ReferralHandler.show_referral_stats, F.data == "referral_stats")
+main_router.callback_query.register(ReferralHandler.show_referral_link, F.data == "referral_link")
+main_router.callback_query.register(ReferralHandler.setup_wallet_start, F.data == "referral_setup_wallet")
+main_router.callback_query.register(ReferralHandler.select_wallet_method, F.data.startswith("wallet_method_"))
+main_router.message.register(ReferralHandler.process_wallet_info, ReferralSystem.enter_wallet)
+main_router.message.register(ReferralHandler.process_full_name, ReferralSystem.setup_wallet)
+main_router.callback_query.register(ReferralHandler.show_earnings, F.data == "referral_earnings")
+main_router.callback_query.register(ReferralHandler.request_payout, F.data == "request_payout")
 
 # Неактивная метка прогресса, чтобы Telegram не показывал вечную загрузку
-@main_router.callback_query(F.data == "portfolio_progress")
 async def portfolio_progress(callback: types.CallbackQuery):
-    await callback.answer()
\ No newline at end of file
+    await callback.answer()
+
+main_router.callback_query.register(portfolio_progress, F.data == "portfolio_progress")
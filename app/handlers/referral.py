@@ -1,47 +1,139 @@
-import random
-import string
+import asyncio
+import base64
+import os
+import re
+from typing import Optional
 from aiogram import types, Bot
 from aiogram.fsm.context import FSMContext
 from aiogram import F
 
-from app.db.database import db
+from app.db import async_db
 from app.fsm import ReferralSystem
 from app.keyboards import referral_main_menu_keyboard, referral_wallet_methods_keyboard, referral_earnings_actions_keyboard, back_button
 from app.utils.message_manager import message_manager
+from app.utils.referral_cache import get_stats_cached, resolve_referrer_cached, invalidate as invalidate_referral_cache
 from app.utils.notification_manager import notification_manager
 from config import config
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Статичные клавиатуры собираются один раз: aiogram их не мутирует,
+# а только сериализует при отправке
+_MAIN_MENU_KB = referral_main_menu_keyboard()
+_WALLET_METHODS_KB = referral_wallet_methods_keyboard()
+_EARNINGS_ACTIONS_KB = referral_earnings_actions_keyboard()
+_BACK_KB = back_button()
+
+# Валидация реквизитов: очистка одним проходом str.translate по C-таблице,
+# проверка — скомпилированными один раз паттернами
+_CARD_STRIP = str.maketrans('', '', ' -')
+_PHONE_STRIP = str.maketrans('', '', ' -()')
+_CARD_RE = re.compile(r"\d{16}")
+_PHONE_RE = re.compile(r"\+7\d{10}")
+
+# Шаблоны с заранее разрешенными константами: на рендере остается
+# один .format с переменными частями вместо дюжины dict-обращений
+_STATS_TEMPLATE = (
+    f"{config.MESSAGES['referral_stats']}\n\n"
+    f"{config.EMOJI['referral']} <b>Приведено пользователей:</b> {{total_referrals}}\n"
+    f"{config.EMOJI['earnings']} <b>Всего заработано:</b> {{total_earned:.2f}}₽\n"
+    f"{config.EMOJI['balance']} <b>Доступно к выводу:</b> {{balance:.2f}}₽\n"
+    f"{config.EMOJI['paid']} <b>Выплачено:</b> {{total_paid:.2f}}₽\n\n"
+    f"{config.EMOJI['link']} <b>Ваш реферальный код:</b> <code>{{referral_code}}</code>\n\n"
+    f"{config.EMOJI['info']} <i>Поделитесь своей ссылкой с друзьями!</i>"
+)
+
+_LINK_TEMPLATE = (
+    f"{config.MESSAGES['referral_link_generated']}\n\n"
+    f"{config.EMOJI['link']} <b>Ваша ссылка:</b>\n"
+    f"<code>{{referral_link}}</code>\n\n"
+    f"{config.EMOJI['money']} За каждый оплаченный заказ по этой ссылке вы получите <b>25%</b> от суммы заказа!"
+)
+
+_EARNING_ROW_TEMPLATE = (
+    "{status_emoji} <b>{earned_amount:.2f}₽</b> ({date})\n"
+    "   Заказ #{order_id} - {order_amount:.2f}₽\n\n"
+)
+
+# Одноразовые статические тексты: dict-обращения к config вынесены
+# на импорт, в обработчиках остаются только LOAD_FAST/LOAD_GLOBAL
+_MSG_WELCOME = config.MESSAGES["referral_welcome"]
+_MSG_NO_STATS = config.MESSAGES["referral_no_stats"]
+_MSG_SETUP_WALLET = config.MESSAGES["setup_wallet_prompt"]
+_MSG_ENTER_CARD = config.MESSAGES["enter_card_number"]
+_MSG_ENTER_PHONE = config.MESSAGES["enter_phone_number"]
+_MSG_ENTER_FULL_NAME = config.MESSAGES["enter_full_name"]
+_MSG_WALLET_SUCCESS = config.MESSAGES["wallet_setup_success"]
+_MSG_NO_EARNINGS = config.MESSAGES["no_earnings"]
+_MSG_INSUFFICIENT_BALANCE = config.MESSAGES["insufficient_balance"]
+_MSG_PAYOUT_SUCCESS = config.MESSAGES["payout_request_success"]
+_EARNINGS_HEADER = f"{config.EMOJI['history']} <b>История начислений</b>\n\n"
+
+# Подпись статуса начисления — маппинг собирается один раз
+_STATUS_EMOJI = {
+    "pending": config.EMOJI["pending"],
+    "confirmed": config.EMOJI["confirmed"],
+    "paid": config.EMOJI["paid"],
+}
+
+_EARNINGS_LEGEND = (
+    f"{config.EMOJI['pending']} Ожидает оплаты\n"
+    f"{config.EMOJI['confirmed']} Оплачен\n"
+    f"{config.EMOJI['paid']} Выплачен"
+)
+
+# Привязка на уровне модуля: генерация кода обходится без
+# attribute-lookup'ов os/base64 на каждый вызов
+_urandom = os.urandom
+_b32encode = base64.b32encode
+
+# Username бота неизменен на все время жизни процесса — получаем один раз,
+# а не ходим в Telegram API при каждом показе реферальной ссылки
+_bot_username: Optional[str] = None
+_bot_username_lock = asyncio.Lock()
+
+def _log_task_exception(task: asyncio.Task) -> None:
+    """done-callback фоновых задач: ошибки не должны теряться молча."""
+    if not task.cancelled() and task.exception():
+        logger.error(f"Background admin notification failed: {task.exception()}")
+
+async def _get_bot_username(bot: Bot) -> str:
+    global _bot_username
+    if _bot_username is None:
+        async with _bot_username_lock:
+            if _bot_username is None:
+                _bot_username = (await bot.get_me()).username
+    return _bot_username
+
 class ReferralHandler:
     
     @staticmethod
     def generate_referral_code(user_id: int) -> str:
-        
-        random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
+        # Один syscall + base32 на C вместо четырех вызовов random и join;
+        # заодно код не зависит от общего состояния PRNG
+        random_part = _b32encode(_urandom(3)).decode("ascii")[:4]
         return f"REF{user_id % 10000}{random_part}"
     
     @staticmethod
     async def start_referral_system(callback: types.CallbackQuery, state: FSMContext) -> None:
         try:
             user_id = callback.from_user.id
-            await state.set_state(ReferralSystem.main)
-            
-            referral_user = db.get_referral_user(user_id)
-            if not referral_user:
-                referral_code = ReferralHandler.generate_referral_code(user_id)
-                referral_user = db.create_referral_user(
-                    user_id=user_id,
-                    username=callback.from_user.username,
-                    referral_code=referral_code
-                )
+            # Запись FSM-состояния и поход в БД независимы — перекрываем ожидания
+            _, referral_user = await asyncio.gather(
+                state.set_state(ReferralSystem.main),
+                async_db.get_or_create_referral_user(
+                    user_id,
+                    callback.from_user.username,
+                    lambda: ReferralHandler.generate_referral_code(user_id),
+                ),
+            )
             
             await message_manager.edit_main_message(
                 user_id,
-                text=config.MESSAGES["referral_welcome"],
+                text=_MSG_WELCOME,
                 message_id=callback.message.message_id,
-                reply_markup=referral_main_menu_keyboard(),
+                reply_markup=_MAIN_MENU_KB,
                 bot=callback.bot,
             )
             
@@ -53,33 +145,25 @@ class ReferralHandler:
     async def show_referral_stats(callback: types.CallbackQuery, state: FSMContext) -> None:
         try:
             user_id = callback.from_user.id
-            stats = db.get_referral_stats(user_id)
+            stats = await get_stats_cached(user_id)
             
             if not stats:
                 await message_manager.edit_main_message(
                     user_id,
-                    text=config.MESSAGES["referral_no_stats"],
+                    text=_MSG_NO_STATS,
                     message_id=callback.message.message_id,
-                    reply_markup=referral_main_menu_keyboard(),
+                    reply_markup=_MAIN_MENU_KB,
                     bot=callback.bot,
                 )
                 return
             
-            stats_text = (
-                f"{config.MESSAGES['referral_stats']}\n\n"
-                f"{config.EMOJI['referral']} <b>Приведено пользователей:</b> {stats['total_referrals']}\n"
-                f"{config.EMOJI['earnings']} <b>Всего заработано:</b> {stats['total_earned']:.2f}₽\n"
-                f"{config.EMOJI['balance']} <b>Доступно к выводу:</b> {stats['balance']:.2f}₽\n"
-                f"{config.EMOJI['paid']} <b>Выплачено:</b> {stats['total_paid']:.2f}₽\n\n"
-                f"{config.EMOJI['link']} <b>Ваш реферальный код:</b> <code>{stats['referral_code']}</code>\n\n"
-                f"{config.EMOJI['info']} <i>Поделитесь своей ссылкой с друзьями!</i>"
-            )
+            stats_text = _STATS_TEMPLATE.format(**stats._asdict())
             
             await message_manager.edit_main_message(
                 user_id,
                 text=stats_text,
                 message_id=callback.message.message_id,
-                reply_markup=referral_main_menu_keyboard(),
+                reply_markup=_MAIN_MENU_KB,
                 bot=callback.bot,
             )
             
@@ -91,27 +175,22 @@ class ReferralHandler:
     async def show_referral_link(callback: types.CallbackQuery, state: FSMContext) -> None:
         try:
             user_id = callback.from_user.id
-            stats = db.get_referral_stats(user_id)
+            stats = await get_stats_cached(user_id)
             
             if not stats:
                 await callback.answer("Ошибка получения данных", show_alert=True)
                 return
             
-            bot_username = (await callback.bot.get_me()).username
-            referral_link = f"https://t.me/{bot_username}?start=ref_{stats['referral_code']}"
+            bot_username = await _get_bot_username(callback.bot)
+            referral_link = f"https://t.me/{bot_username}?start=ref_{stats.referral_code}"
             
-            link_text = (
-                f"{config.MESSAGES['referral_link_generated']}\n\n"
-                f"{config.EMOJI['link']} <b>Ваша ссылка:</b>\n"
-                f"<code>{referral_link}</code>\n\n"
-                f"{config.EMOJI['money']} За каждый оплаченный заказ по этой ссылке вы получите <b>25%</b> от суммы заказа!"
-            )
+            link_text = _LINK_TEMPLATE.format(referral_link=referral_link)
             
             await message_manager.edit_main_message(
                 user_id,
                 text=link_text,
                 message_id=callback.message.message_id,
-                reply_markup=referral_main_menu_keyboard(),
+                reply_markup=_MAIN_MENU_KB,
                 bot=callback.bot,
             )
             
@@ -123,14 +202,17 @@ class ReferralHandler:
     async def setup_wallet_start(callback: types.CallbackQuery, state: FSMContext) -> None:
         try:
             user_id = callback.from_user.id
-            await state.set_state(ReferralSystem.wallet_method)
-            
-            await message_manager.edit_main_message(
-                user_id,
-                text=config.MESSAGES["setup_wallet_prompt"],
-                message_id=callback.message.message_id,
-                reply_markup=referral_wallet_methods_keyboard(),
-                bot=callback.bot,
+            # Редактирование сообщения не зависит от записи состояния —
+            # выполняем оба ожидания параллельно
+            await asyncio.gather(
+                state.set_state(ReferralSystem.wallet_method),
+                message_manager.edit_main_message(
+                    user_id,
+                    text=_MSG_SETUP_WALLET,
+                    message_id=callback.message.message_id,
+                    reply_markup=_WALLET_METHODS_KB,
+                    bot=callback.bot,
+                ),
             )
             
         except Exception as e:
@@ -143,20 +225,23 @@ class ReferralHandler:
             user_id = callback.from_user.id
             method = callback.data.split("_")[-1]
             
-            await state.update_data(payout_method=method)
-            await state.set_state(ReferralSystem.enter_wallet)
-            
             if method == "card":
-                prompt = config.MESSAGES["enter_card_number"]
+                prompt = _MSG_ENTER_CARD
             else:  # sbp
-                prompt = config.MESSAGES["enter_phone_number"]
-            
-            await message_manager.edit_main_message(
-                user_id,
-                text=prompt,
-                message_id=callback.message.message_id,
-                reply_markup=back_button(),
-                bot=callback.bot,
+                prompt = _MSG_ENTER_PHONE
+            
+            # data и state лежат под разными ключами хранилища,
+            # редактирование от них не зависит — три ожидания перекрываются
+            await asyncio.gather(
+                state.update_data(payout_method=method),
+                state.set_state(ReferralSystem.enter_wallet),
+                message_manager.edit_main_message(
+                    user_id,
+                    text=prompt,
+                    message_id=callback.message.message_id,
+                    reply_markup=_BACK_KB,
+                    bot=callback.bot,
+                ),
             )
             
         except Exception as e:
@@ -165,51 +250,51 @@ class ReferralHandler:
 
     @staticmethod
     async def process_wallet_info(message: types.Message, state: FSMContext) -> None:
+        data = await state.get_data()
+        method = data.get("payout_method")
+        text = message.text or ""
+        
+        # Фаза валидации: чистые проверки без try/except, ранний выход
+        if method == "card":
+            card_number = text.translate(_CARD_STRIP)
+            if not _CARD_RE.fullmatch(card_number):
+                await message.answer("❌ Неверный формат номера карты. Попробуйте еще раз.")
+                return
+            update = {"card_number": f"{card_number[:4]} **** **** {card_number[-4:]}"}
+        else:  # sbp
+            phone = text.translate(_PHONE_STRIP)
+            if not _PHONE_RE.fullmatch(phone):
+                await message.answer("❌ Неверный формат номера телефона. Попробуйте еще раз.")
+                return
+            update = {"phone_number": phone}
+        
+        # Фаза побочных эффектов: try только вокруг записи состояния и отправки
         try:
-            user_id = message.from_user.id
-            data = await state.get_data()
-            method = data.get("payout_method")
-            
-            if method == "card":
-                card_number = message.text.replace(" ", "").replace("-", "")
-                if not card_number.isdigit() or len(card_number) != 16:
-                    await message.answer("❌ Неверный формат номера карты. Попробуйте еще раз.")
-                    return
-                
-                masked_card = f"{card_number[:4]} **** **** {card_number[-4:]}"
-                await state.update_data(card_number=masked_card)
-                
-            else:  # sbp
-                phone = message.text.replace(" ", "").replace("-", "").replace("(", "").replace(")", "")
-                if not phone.startswith("+7") or len(phone) != 12:
-                    await message.answer("❌ Неверный формат номера телефона. Попробуйте еще раз.")
-                    return
-                
-                await state.update_data(phone_number=phone)
-            
-            await state.set_state(ReferralSystem.setup_wallet)
+            await asyncio.gather(
+                state.update_data(**update),
+                state.set_state(ReferralSystem.setup_wallet),
+            )
             await message.answer(
-                config.MESSAGES["enter_full_name"],
-                reply_markup=back_button(),
+                _MSG_ENTER_FULL_NAME,
+                reply_markup=_BACK_KB,
                 parse_mode="HTML"
             )
-            
         except Exception as e:
-            logger.error(f"Error processing wallet info: {e}")
+            logger.error("Error processing wallet info: %s", e)
             await message.answer("Произошла ошибка. Попробуйте еще раз.")
 
     @staticmethod
     async def process_full_name(message: types.Message, state: FSMContext) -> None:
+        user_id = message.from_user.id
+        full_name = (message.text or "").strip()
+        
+        if len(full_name.split()) < 2:
+            await message.answer("❌ Введите полное ФИО (Фамилия Имя Отчество)")
+            return
+        
         try:
-            user_id = message.from_user.id
             data = await state.get_data()
-            full_name = message.text.strip()
-            
-            if len(full_name.split()) < 2:
-                await message.answer("❌ Введите полное ФИО (Фамилия Имя Отчество)")
-                return
-            
-            success = db.update_referral_user_payout_info(
+            success = await async_db.update_referral_user_payout_info(
                 user_id=user_id,
                 method=data.get("payout_method"),
                 card_number=data.get("card_number"),
@@ -218,9 +303,10 @@ class ReferralHandler:
             )
             
             if success:
+                invalidate_referral_cache(user_id)
                 await message.answer(
-                    config.MESSAGES["wallet_setup_success"],
-                    reply_markup=referral_main_menu_keyboard(),
+                    _MSG_WALLET_SUCCESS,
+                    reply_markup=_MAIN_MENU_KB,
                     parse_mode="HTML"
                 )
                 await state.set_state(ReferralSystem.main)
@@ -228,54 +314,49 @@ class ReferralHandler:
                 await message.answer("❌ Ошибка сохранения данных. Попробуйте еще раз.")
             
         except Exception as e:
-            logger.error(f"Error processing full name: {e}")
+            logger.error("Error processing full name: %s", e)
             await message.answer("Произошла ошибка. Попробуйте еще раз.")
 
     @staticmethod
     async def show_earnings(callback: types.CallbackQuery, state: FSMContext) -> None:
         try:
             user_id = callback.from_user.id
-            earnings = db.get_referral_earnings(user_id)
+            # 11 строк: десять на экран и одна для признака «есть еще»
+            earnings = await async_db.get_referral_earnings(user_id, limit=11)
             
             if not earnings:
                 await message_manager.edit_main_message(
                     user_id,
-                    text=config.MESSAGES["no_earnings"],
+                    text=_MSG_NO_EARNINGS,
                     message_id=callback.message.message_id,
-                    reply_markup=referral_main_menu_keyboard(),
+                    reply_markup=_MAIN_MENU_KB,
                     bot=callback.bot,
                 )
                 return
             
-            earnings_text = f"{config.EMOJI['history']} <b>История начислений</b>\n\n"
-            
+            parts = [_EARNINGS_HEADER]
+
             for earning in earnings[:10]:
-                status_emoji = {
-                    'pending': config.EMOJI['pending'],
-                    'confirmed': config.EMOJI['confirmed'],
-                    'paid': config.EMOJI['paid']
-                }.get(earning.status, '❓')
-                
-                earnings_text += (
-                    f"{status_emoji} <b>{earning.earned_amount:.2f}₽</b> "
-                    f"({earning.created_at.strftime('%d.%m.%Y')})\n"
-                    f"   Заказ #{earning.order_id} - {earning.order_amount:.2f}₽\n\n"
-                )
-            
+                status_emoji = _STATUS_EMOJI.get(earning.status, '❓')
+                parts.append(_EARNING_ROW_TEMPLATE.format(
+                    status_emoji=status_emoji,
+                    earned_amount=earning.earned_amount,
+                    date=earning.created_at.strftime('%d.%m.%Y'),
+                    order_id=earning.order_id,
+                    order_amount=earning.order_amount,
+                ))
+
             if len(earnings) > 10:
-                earnings_text += f"<i>... и еще {len(earnings) - 10} начислений</i>\n\n"
-            
-            earnings_text += (
-                f"{config.EMOJI['pending']} Ожидает оплаты\n"
-                f"{config.EMOJI['confirmed']} Оплачен\n"
-                f"{config.EMOJI['paid']} Выплачен"
-            )
+                parts.append("<i>... показаны последние 10 начислений</i>\n\n")
+
+            parts.append(_EARNINGS_LEGEND)
+            earnings_text = "".join(parts)
             
             await message_manager.edit_main_message(
                 user_id,
                 text=earnings_text,
                 message_id=callback.message.message_id,
-                reply_markup=referral_earnings_actions_keyboard(),
+                reply_markup=_EARNINGS_ACTIONS_KB,
                 bot=callback.bot,
             )
             
@@ -285,49 +366,58 @@ class ReferralHandler:
 
     @staticmethod
     async def request_payout(callback: types.CallbackQuery, state: FSMContext) -> None:
+        user_id = callback.from_user.id
+        # Узкая выборка без агрегатов: для проверок выплаты достаточно
+        # пяти скаляров, и баланс должен быть свежим, а не из кэша
+        stats = await async_db.get_payout_readiness(user_id)
+
+        # Фаза валидации: бизнес-проверки без try — отказ пользователю
+        # не исключительная ситуация
+        if not stats or stats.balance < 500:
+            await callback.answer(
+                _MSG_INSUFFICIENT_BALANCE,
+                show_alert=True
+            )
+            return
+        
+        if not stats.full_name or (not stats.card_number and not stats.phone_number):
+            await callback.answer(
+                "❌ Сначала настройте данные для выплат",
+                show_alert=True
+            )
+            return
+        
+        if stats.payout_method == 'card':
+            recipient_info = f"Карта: {stats.card_number}, {stats.full_name}"
+        else:
+            recipient_info = f"СБП: {stats.phone_number}, {stats.full_name}"
+        
+        # Фаза побочных эффектов: try только вокруг записи и ответа
         try:
-            user_id = callback.from_user.id
-            stats = db.get_referral_stats(user_id)
-            
-            if not stats or stats['balance'] < 500:
-                await callback.answer(
-                    config.MESSAGES["insufficient_balance"],
-                    show_alert=True
-                )
-                return
-            
-            if not stats['full_name'] or (not stats['card_number'] and not stats['phone_number']):
-                await callback.answer(
-                    "❌ Сначала настройте данные для выплат",
-                    show_alert=True
-                )
-                return
-            
-            if stats['payout_method'] == 'card':
-                recipient_info = f"Карта: {stats['card_number']}, {stats['full_name']}"
-            else:
-                recipient_info = f"СБП: {stats['phone_number']}, {stats['full_name']}"
-            
-            payout = db.create_referral_payout_request(
+            payout = await async_db.create_referral_payout_request(
                 referrer_id=user_id,
-                amount=stats['balance'],
-                method=stats['payout_method'],
+                amount=stats.balance,
+                method=stats.payout_method,
                 recipient_info=recipient_info
             )
             
             if payout:
-                await notification_manager.notify_admins(
+                invalidate_referral_cache(user_id)
+                # Уведомление админов уходит фоном — пользователь получает
+                # подтверждение сразу, не дожидаясь рассылки
+                notify_task = asyncio.create_task(notification_manager.notify_admins(
                     f"💸 <b>Новый запрос на выплату реферальных!</b>\n\n"
                     f"👤 Пользователь: @{callback.from_user.username}\n"
                     f"🆔 ID: {user_id}\n"
-                    f"💰 Сумма: {stats['balance']:.2f}₽\n"
-                    f"💳 Метод: {stats['payout_method']}\n"
+                    f"💰 Сумма: {stats.balance:.2f}₽\n"
+                    f"💳 Метод: {stats.payout_method}\n"
                     f"📝 Реквизиты: {recipient_info}",
                     callback.bot
-                )
-                
+                ))
+                notify_task.add_done_callback(_log_task_exception)
+
                 await callback.answer(
-                    config.MESSAGES["payout_request_success"],
+                    _MSG_PAYOUT_SUCCESS,
                     show_alert=True
                 )
             else:
@@ -340,31 +430,20 @@ class ReferralHandler:
     @staticmethod
     async def process_referral_start(user_id: int, referral_code: str, username: str = None) -> bool:
         try:
-            referrer = db.get_referral_user_by_code(referral_code)
-            if not referrer:
-                return False
-            
-            if referrer.user_id == user_id:
+            # Несуществующие коды (боты, битые ссылки) отсекаются по кэшу
+            # без транзакции; валидный код все равно перепроверяется в ней
+            if await resolve_referrer_cached(referral_code) is None:
                 return False
-            
-            existing_referral = db.get_referral_user(user_id)
-            if existing_referral and existing_referral.referred_by:
-                return False
-            
-            if existing_referral:
-                existing_referral.referred_by = referrer.user_id
-            else:
-                new_code = ReferralHandler.generate_referral_code(user_id)
-                db.create_referral_user(
-                    user_id=user_id,
-                    username=username,
-                    referral_code=new_code,
-                    referred_by=referrer.user_id
-                )
-            
-            logger.info(f"User {user_id} became referral of {referrer.user_id}")
-            return True
-            
+
+            # Все проверки и привязка — одним DAO-вызовом в одной транзакции
+            result = await async_db.attach_referrer(
+                user_id,
+                username,
+                referral_code,
+                lambda: ReferralHandler.generate_referral_code(user_id)
+            )
+            return result == 'ok'
+
         except Exception as e:
             logger.error(f"Error processing referral start: {e}")
             return False
@@ -1,218 +1,359 @@
+from functools import lru_cache, partial
 from typing import List, Optional
-import re
+import string
+from aiogram.filters.callback_data import CallbackData
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from aiogram.types import InlineKeyboardButton
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from config import config
 
+
+# Подписи кнопок разрешаются один раз на импорте: в методах остаются
+# только ссылки на готовые интернированные строки, без dict-обращений
+# к config.EMOJI и f-string-форматирования на каждую сборку клавиатуры
+_E = config.EMOJI
+_LBL_ACCEPT = f"{_E['success']} Принять"
+_LBL_ADD_PROJECT = f"{_E['add']} Добавить проект"
+_LBL_ADMIN_CONSULTATIONS = f"{_E['consultation']} Консультации"
+_LBL_ADMIN_ORDERS = f"{_E['orders']} Заказы"
+_LBL_ADMIN_PANEL = f"{_E['crown']} Админ-панель"
+_LBL_ADMIN_REFERRALS = f"{_E['diamond']} Рефералы"
+_LBL_ADMIN_TEAM = f"{_E['team']} Команда"
+_LBL_APPROVE = f"{_E['success']} Одобрить"
+_LBL_BACK = f"{_E['back']} Назад"
+_LBL_CANCEL = f"{_E['error']} Отмена"
+_LBL_COMPLETE = f"{_E['success']} Завершить"
+_LBL_CONFIRM_DELETE = f"{_E['success']} Да, удалить"
+_LBL_CONSULTATION = f"{_E['bulb']} Консультация"
+_LBL_CONTACT = f"{_E['contact']} Связаться"
+_LBL_DELETE_PROJECT = f"{_E['delete']} Удалить проект"
+_LBL_DETAILS = f"{_E['info']} Подробнее"
+_LBL_EDIT_BOT_LINK = f"{_E['edit']} Ссылка на бота"
+_LBL_EDIT_COST = f"{_E['edit']} Стоимость"
+_LBL_EDIT_DESC = f"{_E['edit']} Описание"
+_LBL_EDIT_DETAILS = f"{_E['edit']} Детали"
+_LBL_EDIT_DURATION = f"{_E['edit']} Длительность"
+_LBL_EDIT_PRICE = f"{_E['edit']} Изменить цену"
+_LBL_EDIT_PROJECT = f"{_E['edit']} Редактировать проект"
+_LBL_EDIT_TECH = f"{_E['edit']} Технологии"
+_LBL_EDIT_TITLE = f"{_E['edit']} Название"
+_LBL_EDIT_VIDEO = f"{_E['edit']} Видео"
+_LBL_GO_TO_BOT = f"{_E['next']} Перейти к боту"
+_LBL_JOIN_TEAM = f"{_E['handshake']} В команду"
+_LBL_NEXT_ARROW = _E['next']
+_LBL_ORDER = f"{_E['rocket']} Заказать"
+_LBL_ORDER_BOT = f"{_E['robot']} Телеграм бот"
+_LBL_ORDER_MINIAPP = f"{_E['phone']} Мини-приложение"
+_LBL_PORTFOLIO = f"{_E['trophy']} Портфолио"
+_LBL_PREV_ARROW = _E['back']
+_LBL_REFERRAL = f"{_E['gift']} Реферальная система"
+_LBL_REF_EARNINGS = f"{_E['history']} Начисления"
+_LBL_REF_LINK = f"{_E['link']} Моя ссылка"
+_LBL_REF_STATS = f"{_E['chart']} Статистика"
+_LBL_REF_WALLET = f"{_E['wallet']} Настроить выплаты"
+_LBL_REJECT = f"{_E['error']} Отклонить"
+_LBL_REQUEST_PAYOUT = f"{_E['money']} Запросить выплату"
+_LBL_SET_PRICE = f"{_E['money']} Установить цену"
+_LBL_SUBSCRIBE = f"{_E['star']} Подписаться на Codif"
+_LBL_SUCCESS_TO_MAIN = f"{_E['sparkles']} В главное меню"
+_LBL_TO_ADMIN_MENU = f"{_E['back']} В админ-меню"
+_LBL_TO_LIST = f"{_E['back']} К списку"
+_LBL_TO_MAIN_MENU = f"{_E['back']} В главное меню"
+_LBL_TO_MANAGEMENT = f"{_E['back']} К управлению"
+_LBL_WALLET_CARD = f"{_E['card']} Банковская карта"
+_LBL_WALLET_SBP = f"{_E['phone']} СБП (по номеру)"
+
+# Модуль — единственный производитель кнопок, а входы уже типизированы
+# (id — int, callback — интернированные шаблоны, url — после нормализации),
+# поэтому полная Pydantic-валидация на каждом объекте лишняя.
+# model_construct заполняет значения по умолчанию и пропускает валидаторы;
+# флаг возвращает строгую проверку при отладке.
+_STRICT_VALIDATION = False
+
+def _btn(**kwargs) -> InlineKeyboardButton:
+    if _STRICT_VALIDATION:
+        return InlineKeyboardButton(**kwargs)
+    return InlineKeyboardButton.model_construct(**kwargs)
+
+def _mk(rows) -> InlineKeyboardMarkup:
+    if _STRICT_VALIDATION:
+        return InlineKeyboardMarkup(inline_keyboard=rows)
+    return InlineKeyboardMarkup.model_construct(inline_keyboard=rows)
+
+# Кнопки с фиксированным callback, встречающиеся почти в каждой разметке —
+# готовые неизменяемые объекты, один экземпляр на процесс
+_BTN_BACK_TO_MAIN = _btn(text=_LBL_BACK, callback_data="back_to_main")
+_BTN_MAIN_MENU = _btn(text=_LBL_TO_MAIN_MENU, callback_data="back_to_main")
+_BTN_TO_ADMIN_MENU = _btn(text=_LBL_TO_ADMIN_MENU, callback_data="admin_panel")
+_BTN_BACK_TO_PORTFOLIO = _btn(text=_LBL_BACK, callback_data="admin_portfolio")
+_BTN_BACK_TO_REFERRAL = _btn(text=_LBL_BACK, callback_data="referral_system")
+
+def _pack(buttons, sizes):
+    """Разбивка плоского списка кнопок на ряды; последний размер
+    повторяется до исчерпания списка — та же семантика, что у adjust()."""
+    rows = []
+    i = 0
+    n = len(buttons)
+    last = sizes[-1]
+    for s in sizes:
+        if i >= n:
+            return rows
+        rows.append(buttons[i:i + s])
+        i += s
+    while i < n:
+        rows.append(buttons[i:i + last])
+        i += last
+    return rows
+
+# Таблица item_actions: вместо цепочки сравнений item_type — одна выборка
+# (фабрика доп. кнопок, раскладка без навигации, раскладка с навигацией)
+def _order_extras(item_id, cb):
+    return [_btn(text=_LBL_SET_PRICE, callback_data=_CB_SET_PRICE(item_id)),
+            _btn(text=_LBL_REJECT, callback_data=cb["reject"](item_id))]
+
+def _accept_reject_extras(item_id, cb):
+    return [_btn(text=_LBL_ACCEPT, callback_data=cb["accept"](item_id)),
+            _btn(text=_LBL_REJECT, callback_data=cb["reject"](item_id))]
+
+def _consult_extras(item_id, cb):
+    return _accept_reject_extras(item_id, cb) + [
+        _btn(text="✉️ Ответить", callback_data=_CB_CONSULT_REPLY(item_id)),
+        _btn(text=_LBL_COMPLETE, callback_data=_CB_CONSULT_COMPLETE(item_id)),
+    ]
+
+_ITEM_ACTIONS_SPEC = {
+    "order": (_order_extras, (2, 2, 1), (2, 2, 2, 1, 1)),
+    "app": (_accept_reject_extras, (2, 1, 1), (2, 2, 1, 1)),
+    "consult": (_consult_extras, (2, 2, 1, 1), (2, 2, 2, 1, 1)),
+}
+
+# Маппинги секций админки — словари собираются один раз, а не на каждый вызов
+_SECTION_KEY_MAP = {
+    "заявок на разработку": "orders",
+    "заявки на разработку": "orders",
+    "orders": "orders",
+    "заявок в команду": "applications",
+    "заявки в команду": "applications",
+    "applications": "applications",
+    "консультаций": "consultations",
+    "консультации": "consultations",
+    "consultations": "consultations",
+}
+
+_ITEM_LIST_KEY_MAP = {
+    "order": "orders",
+    "app": "applications",
+    "consult": "consultations",
+}
+
+# Шаблоны callback_data: постоянные префиксы интернируются один раз,
+# подстановка id идет через связанный %-форматтер без f-string байткода
+_CB_SET_PRICE = "order_set_price_%d".__mod__
+_CB_CONSULT_REPLY = "consult_reply_%d".__mod__
+_CB_CONSULT_COMPLETE = "consult_complete_%d".__mod__
+_CB_CONTACT_URL = "tg://user?id=%d".__mod__
+_CB_PEDIT_TITLE = "pedit_title_%d".__mod__
+_CB_PEDIT_DESC = "pedit_desc_%d".__mod__
+_CB_PEDIT_DETAILS = "pedit_details_%d".__mod__
+_CB_PEDIT_COST = "pedit_cost_%d".__mod__
+_CB_PEDIT_TECH = "pedit_tech_%d".__mod__
+_CB_PEDIT_DURATION = "pedit_duration_%d".__mod__
+_CB_PEDIT_VIDEO = "pedit_video_%d".__mod__
+_CB_PEDIT_BOT = "pedit_bot_%d".__mod__
+_CB_PDELETE_CONFIRM = "pdelete_confirm_%d".__mod__
+_CB_PAYOUT_PREV = "payout_prev_%d".__mod__
+_CB_PAYOUT_NEXT = "payout_next_%d".__mod__
+_CB_PAYOUT_APPROVE = "payout_approve_%d".__mod__
+_CB_PAYOUT_REJECT = "payout_reject_%d".__mod__
+_CB_PAYOUT_COMPLETE = "payout_complete_%d".__mod__
+_CB_ACCEPTED_PREV = "accepted_order_prev_%d".__mod__
+_CB_ACCEPTED_NEXT = "accepted_order_next_%d".__mod__
+_CB_CONFIRM_PAYMENT = "confirm_payment_%d".__mod__
+_CB_EDIT_PRICE = "order_edit_price_%d".__mod__
+
+# По одному набору форматтеров на item_type — собирается при первом
+# обращении и дальше переиспользуется
+_ITEM_CB_CACHE: dict = {}
+
+def _item_cb(item_type: str) -> dict:
+    cb = _ITEM_CB_CACHE.get(item_type)
+    if cb is None:
+        cb = _ITEM_CB_CACHE[item_type] = {
+            "prev": (item_type + "_prev_%d").__mod__,
+            "next": (item_type + "_next_%d").__mod__,
+            "accept": (item_type + "_accept_%d").__mod__,
+            "reject": (item_type + "_reject_%d").__mod__,
+        }
+    return cb
+
+
+# Нормализация ссылок на бота: username — это просто длина плюс
+# принадлежность множеству символов, движок регулярок здесь лишний
+_USERNAME_CHARS = frozenset(string.ascii_letters + string.digits + "_")
+_URL_PREFIXES = ("t.me/", "telegram.me/", "telegram.dog/")
+_HTTP_PREFIXES = ("http://", "https://")
+
+@lru_cache(maxsize=512)
+def _normalize_bot_url(url: Optional[str]) -> Optional[str]:
+    """Приведение ссылки на бота к https-виду; результат кэшируется —
+    один и тот же url нормализуется при каждом листании портфолио."""
+    # NOTE: не оборачивать в @numba.jit — строковые операции там работают
+    # в object-mode и медленнее CPython на коротких строках
+    # (numba/numba#2585, numba/numba#7300)
+    if not url:
+        return None
+    # В базе url почти всегда без крайних пробелов — strip() и его
+    # аллокация нужны только в редком случае
+    if url[0].isspace() or url[-1].isspace():
+        u = url.strip()
+        if not u:
+            return None
+    else:
+        u = url
+    if u.startswith("tg://"):
+        return u
+    if u.startswith("@"):
+        return f"https://t.me/{u[1:]}"
+    if 5 <= len(u) <= 32 and set(u) <= _USERNAME_CHARS:
+        return f"https://t.me/{u}"
+    if u.startswith(_URL_PREFIXES):
+        return f"https://{u}"
+    if u.startswith(_HTTP_PREFIXES):
+        return u
+    return None
+
+class PortfolioNav(CallbackData, prefix="pf"):
+    """Навигация по портфолио: фабрика парсит индекс один раз при роутинге,
+    без startswith-сканов и ручного split в обработчиках."""
+    action: str
+    idx: int
+
+# Статичные разметки строятся один раз: as_markup() возвращает
+# неизменяемую Pydantic-модель, безопасно отдавать один объект всем
+# пользователям вместо пересборки кнопок на каждый callback
+_STATIC_MARKUPS: dict = {}
+
+def _cached(key, factory):
+    markup = _STATIC_MARKUPS.get(key)
+    if markup is None:
+        markup = _STATIC_MARKUPS[key] = factory()
+    return markup
+
 class KeyboardBuilder:
+    # Экземпляр kb существует только ради совместимости импортов —
+    # пустые __slots__ убирают ненужный per-instance __dict__
+    __slots__ = ()
     
     @staticmethod
     def _normalize_bot_url(url: Optional[str]) -> Optional[str]:
-        if not url:
-            return None
-        u = url.strip()
-        if not u:
-            return None
-        if u.startswith("tg://"):
-            return u
-        if u.startswith("@"):
-            return f"https://t.me/{u[1:]}"
-        if re.fullmatch(r"[A-Za-z0-9_]{5,32}", u):
-            return f"https://t.me/{u}"
-        if u.startswith("t.me/") or u.startswith("telegram.me/") or u.startswith("telegram.dog/"):
-            return f"https://{u}"
-        if u.startswith("http://") or u.startswith("https://"):
-            return u
-        return None
+        return _normalize_bot_url(url)
 
     @staticmethod
     def main_menu(user_id: int, is_admin: bool = False) -> InlineKeyboardBuilder:
-        builder = InlineKeyboardBuilder()
-        builder.button(
-            text=f"{config.EMOJI['rocket']} Заказать", 
-            callback_data="order_bot"
-        )
-        builder.button(
-            text=f"{config.EMOJI['handshake']} В команду", 
-            callback_data="join_team"
-        )
-        builder.button(
-            text=f"{config.EMOJI['trophy']} Портфолио", 
-            callback_data="portfolio"
-        )
-        builder.button(
-            text=f"{config.EMOJI['bulb']} Консультация", 
-            callback_data="consultation"
-        )
-        builder.button(
-            text=f"{config.EMOJI['gift']} Реферальная система", 
-            callback_data="referral_system"
-        )
-        builder.button(
-            text=f"{config.EMOJI['star']} Подписаться на Codif", 
-            url=config.CHANNEL_LINK
-        )
-        if is_admin:
-            builder.button(
-                text=f"{config.EMOJI['crown']} Админ-панель", 
-                callback_data="admin_panel"
-            )
+        return _cached(f"main_menu_{is_admin}",
+                       lambda: KeyboardBuilder._build_main_menu(is_admin))
+
+    @staticmethod
+    def _build_main_menu(is_admin: bool) -> InlineKeyboardMarkup:
+        # Раскладка известна заранее — собираем ряды напрямую, без
+        # повторной валидации кнопок и прохода adjust()
+        rows = [
+            [_btn(text=_LBL_ORDER, callback_data="order_bot"),
+             _btn(text=_LBL_JOIN_TEAM, callback_data="join_team")],
+            [_btn(text=_LBL_PORTFOLIO, callback_data="portfolio"),
+             _btn(text=_LBL_CONSULTATION, callback_data="consultation")],
+            [_btn(text=_LBL_REFERRAL, callback_data="referral_system")],
+            [_btn(text=_LBL_SUBSCRIBE, url=config.CHANNEL_LINK)],
+        ]
         if is_admin:
-            builder.adjust(2, 2, 1, 1, 1)
-        else:
-            builder.adjust(2, 2, 1, 1)
-        return builder.as_markup()
+            rows.append([_btn(text=_LBL_ADMIN_PANEL, callback_data="admin_panel")])
+        return _mk(rows)
 
     @staticmethod
     def order_type_selection() -> InlineKeyboardBuilder:
-        builder = InlineKeyboardBuilder()
-        builder.button(
-            text=f"{config.EMOJI['robot']} Телеграм бот", 
-            callback_data="order_type_bot"
-        )
-        builder.button(
-            text=f"{config.EMOJI['phone']} Мини-приложение", 
-            callback_data="order_type_miniapp"
-        )
-        builder.button(
-            text=f"{config.EMOJI['back']} Назад", 
-            callback_data="back_to_main"
-        )
-        builder.adjust(1, 1, 1)
-        return builder.as_markup()
+        return _cached("order_type_selection", KeyboardBuilder._build_order_type_selection)
+
+    @staticmethod
+    def _build_order_type_selection() -> InlineKeyboardMarkup:
+        return _mk([
+            [_btn(text=_LBL_ORDER_BOT, callback_data="order_type_bot")],
+            [_btn(text=_LBL_ORDER_MINIAPP, callback_data="order_type_miniapp")],
+            [_BTN_BACK_TO_MAIN],
+        ])
 
     @staticmethod
-    def back_button(callback_data: str = "cancel_questionnaire") -> InlineKeyboardBuilder:
-        builder = InlineKeyboardBuilder()
-        builder.button(
-            text=f"{config.EMOJI['back']} Назад", 
-            callback_data=callback_data
-        )
-        return builder.as_markup()
+    @lru_cache(maxsize=256)
+    def back_button(callback_data: str = "cancel_questionnaire") -> InlineKeyboardMarkup:
+        return _mk([[_btn(text=_LBL_BACK, callback_data=callback_data)]])
 
     @staticmethod
+    @lru_cache(maxsize=2048)
     def portfolio_navigation(
         current_index: int,
         total: int,
         show_details: bool = False,
         bot_url: Optional[str] = None,
     ) -> InlineKeyboardBuilder:
-        builder = InlineKeyboardBuilder()
-        progress = f"📊 {current_index + 1}/{total}"
-        if total > 1:
-            builder.button(
-                text=f"{config.EMOJI['back']}", 
-                callback_data=f"portfolio_prev_{current_index}"
-            )
-            builder.button(
-                text=f"{config.EMOJI['next']}", 
-                callback_data=f"portfolio_next_{current_index}"
-            )
-            builder.button(
-                text=progress,
-                callback_data="portfolio_progress"
-            )
+        progress_btn = _btn(text=f"📊 {current_index + 1}/{total}",
+                            callback_data="portfolio_progress")
         if not show_details:
-            builder.button(
-                text=f"{config.EMOJI['info']} Подробнее", 
-                callback_data=f"portfolio_details_{current_index}"
-            )
+            toggle_btn = _btn(text=_LBL_DETAILS,
+                              callback_data=PortfolioNav(action="details", idx=current_index).pack())
         else:
-            builder.button(
-                text=f"{config.EMOJI['back']} К списку", 
-                callback_data=f"portfolio_back_{current_index}"
-            )
-        safe_url = KeyboardBuilder._normalize_bot_url(bot_url)
-        if safe_url:
-            builder.button(
-                text=f"{config.EMOJI['next']} Перейти к боту",
-                url=safe_url
-            )
-
-        builder.button(
-            text=f"{config.EMOJI['back']} В главное меню", 
-            callback_data="back_to_main"
-        )
+            toggle_btn = _btn(text=_LBL_TO_LIST,
+                              callback_data=PortfolioNav(action="back", idx=current_index).pack())
+
+        rows = []
         if total > 1:
-            if safe_url:
-                builder.adjust(2, 1, 1, 1, 1)
-            else:
-                builder.adjust(2, 1, 1, 1)
-        else:
-            builder.button(
-                text=progress,
-                callback_data="portfolio_progress"
-            )
-            if safe_url:
-                builder.adjust(1, 1, 1, 1)
-            else:
-                builder.adjust(1, 1, 1)
-        return builder.as_markup()
+            rows.append([
+                _btn(text=_LBL_PREV_ARROW,
+                     callback_data=PortfolioNav(action="prev", idx=current_index).pack()),
+                _btn(text=_LBL_NEXT_ARROW,
+                     callback_data=PortfolioNav(action="next", idx=current_index).pack()),
+            ])
+            rows.append([progress_btn])
+        rows.append([toggle_btn])
+
+        safe_url = _normalize_bot_url(bot_url)
+        if safe_url:
+            rows.append([_btn(text=_LBL_GO_TO_BOT, url=safe_url)])
+
+        rows.append([_BTN_MAIN_MENU])
+        if total <= 1:
+            rows.append([progress_btn])
+        return _mk(rows)
 
     @staticmethod
     def admin_menu() -> InlineKeyboardBuilder:
-        builder = InlineKeyboardBuilder()
-        builder.button(
-            text=f"{config.EMOJI['orders']} Заказы", 
-            callback_data="admin_orders"
-        )
-        builder.button(
-            text=f"{config.EMOJI['team']} Команда", 
-            callback_data="admin_team"
-        )
-        builder.button(
-            text=f"{config.EMOJI['consultation']} Консультации", 
-            callback_data="admin_consultations"
-        )
-        builder.button(
-            text=f"{config.EMOJI['diamond']} Рефералы", 
-            callback_data="admin_referrals"
-        )
-        builder.button(
-            text="📊 Мониторинг", 
-            callback_data="system_monitor"
-        )
-        builder.button(
-            text="⚙️ Настройки", 
-            callback_data="admin_settings"
-        )
-        builder.button(
-            text=f"{config.EMOJI['back']} Назад", 
-            callback_data="back_to_main"
-        )
-        builder.adjust(2, 2, 2, 1)
-        return builder.as_markup()
+        return _cached("admin_menu", KeyboardBuilder._build_admin_menu)
 
     @staticmethod
-    def admin_section_menu(section_name: str, back_to: str = "admin_panel") -> InlineKeyboardBuilder:
-        builder = InlineKeyboardBuilder()
-        section_key_map = {
-            "заявок на разработку": "orders",
-            "заявки на разработку": "orders",
-            "orders": "orders",
-            "заявок в команду": "applications",
-            "заявки в команду": "applications",
-            "applications": "applications",
-            "консультаций": "consultations",
-            "консультации": "consultations",
-            "consultations": "consultations",
-        }
-        normalized = section_name.strip().lower()
-        section_key = section_key_map.get(normalized, normalized)
-
-        builder.button(
-            text=f" Список {section_name}",
-            callback_data=f"admin_{section_key}_list"
-        )
-        builder.button(
-            text=f"{config.EMOJI['back']} В админ-меню",
-            callback_data=back_to
-        )
+    def _build_admin_menu() -> InlineKeyboardMarkup:
+        return _mk([
+            [_btn(text=_LBL_ADMIN_ORDERS, callback_data="admin_orders"),
+             _btn(text=_LBL_ADMIN_TEAM, callback_data="admin_team")],
+            [_btn(text=_LBL_ADMIN_CONSULTATIONS, callback_data="admin_consultations"),
+             _btn(text=_LBL_ADMIN_REFERRALS, callback_data="admin_referrals")],
+            [_btn(text="📊 Мониторинг", callback_data="system_monitor"),
+             _btn(text="⚙️ Настройки", callback_data="admin_settings")],
+            [_BTN_BACK_TO_MAIN],
+        ])
 
-        builder.adjust(1)
-        return builder.as_markup()
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def admin_section_menu(section_name: str, back_to: str = "admin_panel") -> InlineKeyboardBuilder:
+        # Канонические строки (их и передают обертки *_orders_keyboard)
+        # попадают в словарь без промежуточных strip/lower-аллокаций
+        section_key = _SECTION_KEY_MAP.get(section_name)
+        if section_key is None:
+            normalized = section_name.strip().lower()
+            section_key = _SECTION_KEY_MAP.get(normalized, normalized)
+        return _mk([
+            [_btn(text=f" Список {section_name}", callback_data=f"admin_{section_key}_list")],
+            [_btn(text=_LBL_TO_ADMIN_MENU, callback_data=back_to)],
+        ])
 
     @staticmethod
+    @lru_cache(maxsize=4096)
     def item_actions(
         item_id: int, 
         user_id: int, 
@@ -220,348 +361,193 @@ class KeyboardBuilder:
         total: int,
         item_type: str,
         show_contact: bool = True
-    ) -> InlineKeyboardBuilder:
-        builder = InlineKeyboardBuilder()
+    ) -> InlineKeyboardMarkup:
+        cb = _item_cb(item_type)
+        extras, small, large = _ITEM_ACTIONS_SPEC.get(item_type, _ITEM_ACTIONS_SPEC["app"])
         
+        buttons = []
         if total > 1:
-            builder.button(
-                text=f"{config.EMOJI['back']}", 
-                callback_data=f"{item_type}_prev_{current_index}"
-            )
-            builder.button(
-                text=f"{config.EMOJI['next']}", 
-                callback_data=f"{item_type}_next_{current_index}"
-            )
-        
-        if item_type == "order":
-            builder.button(
-                text=f"{config.EMOJI['money']} Установить цену", 
-                callback_data=f"order_set_price_{item_id}"
-            )
-            builder.button(
-                text=f"{config.EMOJI['error']} Отклонить", 
-                callback_data=f"{item_type}_reject_{item_id}"
-            )
-        else:
-            builder.button(
-                text=f"{config.EMOJI['success']} Принять", 
-                callback_data=f"{item_type}_accept_{item_id}"
-            )
-            builder.button(
-                text=f"{config.EMOJI['error']} Отклонить", 
-                callback_data=f"{item_type}_reject_{item_id}"
-            )
-        
-        if item_type == "consult":
-            builder.button(
-                text=f"✉️ Ответить", 
-                callback_data=f"consult_reply_{item_id}"
-            )
-            builder.button(
-                text=f"{config.EMOJI['success']} Завершить", 
-                callback_data=f"consult_complete_{item_id}"
-            )
-        
+            buttons.append(_btn(text=_LBL_PREV_ARROW, callback_data=cb["prev"](current_index)))
+            buttons.append(_btn(text=_LBL_NEXT_ARROW, callback_data=cb["next"](current_index)))
+        buttons += extras(item_id, cb)
         if show_contact:
-            builder.button(
-                text=f"{config.EMOJI['contact']} Связаться", 
-                url=f"tg://user?id={user_id}"
-            )
-        
-        list_key_map = {
-            "order": "orders",
-            "app": "applications",
-            "consult": "consultations",
-        }
-        list_key = list_key_map.get(item_type, f"{item_type}s")
-        builder.button(
-            text=f"{config.EMOJI['back']} К списку",
-            callback_data=f"admin_{list_key}_list"
-        )
+            buttons.append(_btn(text=_LBL_CONTACT, url=_CB_CONTACT_URL(user_id)))
         
-        if total > 1:
-            if item_type == "order":
-                builder.adjust(2, 2, 2, 1, 1)
-            elif item_type == "consult":
-                builder.adjust(2, 2, 2, 1, 1)
-            else:
-                builder.adjust(2, 2, 1, 1)
-        else:
-            if item_type == "order":
-                builder.adjust(2, 2, 1)
-            elif item_type == "consult":
-                builder.adjust(2, 2, 1, 1)
-            else:
-                builder.adjust(2, 1, 1)
+        # or вместо default-аргумента get(): плюрализация вычисляется
+        # только при промахе, а не на каждом вызове
+        list_key = _ITEM_LIST_KEY_MAP.get(item_type) or item_type + "s"
+        buttons.append(_btn(text=_LBL_TO_LIST, callback_data=f"admin_{list_key}_list"))
         
-        return builder.as_markup()
+        return _mk(_pack(buttons, large if total > 1 else small))
 
     @staticmethod
     def portfolio_management() -> InlineKeyboardBuilder:
-        builder = InlineKeyboardBuilder()
-        builder.button(
-            text=f"{config.EMOJI['add']} Добавить проект", 
-            callback_data="portfolio_add"
-        )
-        builder.button(
-            text=f"{config.EMOJI['edit']} Редактировать проект", 
-            callback_data="portfolio_edit_list"
-        )
-        builder.button(
-            text=f"{config.EMOJI['delete']} Удалить проект", 
-            callback_data="portfolio_delete_list"
-        )
-        builder.button(
-            text=f"{config.EMOJI['back']} В админ-меню", 
-            callback_data="admin_panel"
-        )
-        
-        builder.adjust(1)
-        return builder.as_markup()
+        return _cached("portfolio_management", KeyboardBuilder._build_portfolio_management)
 
     @staticmethod
-    def portfolio_edit(project_id: int) -> InlineKeyboardBuilder:
-        builder = InlineKeyboardBuilder()
-        builder.button(
-            text=f"{config.EMOJI['edit']} Название", 
-            callback_data=f"pedit_title_{project_id}"
-        )
-        builder.button(
-            text=f"{config.EMOJI['edit']} Описание", 
-            callback_data=f"pedit_desc_{project_id}"
-        )
-        builder.button(
-            text=f"{config.EMOJI['edit']} Детали", 
-            callback_data=f"pedit_details_{project_id}"
-        )
-        builder.button(
-            text=f"{config.EMOJI['edit']} Стоимость", 
-            callback_data=f"pedit_cost_{project_id}"
-        )
-        builder.button(
-            text=f"{config.EMOJI['edit']} Технологии", 
-            callback_data=f"pedit_tech_{project_id}"
-        )
-        builder.button(
-            text=f"{config.EMOJI['edit']} Длительность", 
-            callback_data=f"pedit_duration_{project_id}"
-        )
-        builder.button(
-            text=f"{config.EMOJI['edit']} Видео",
-            callback_data=f"pedit_video_{project_id}"
-        )
-        builder.button(
-            text=f"{config.EMOJI['edit']} Ссылка на бота",
-            callback_data=f"pedit_bot_{project_id}"
-        )
-        builder.button(
-            text=f"{config.EMOJI['back']} К управлению", 
-            callback_data="admin_portfolio"
-        )
-        
-        builder.adjust(2, 2, 2, 2, 1)
-        return builder.as_markup()
+    def _build_portfolio_management() -> InlineKeyboardMarkup:
+        return _mk([
+            [_btn(text=_LBL_ADD_PROJECT, callback_data="portfolio_add")],
+            [_btn(text=_LBL_EDIT_PROJECT, callback_data="portfolio_edit_list")],
+            [_btn(text=_LBL_DELETE_PROJECT, callback_data="portfolio_delete_list")],
+            [_BTN_TO_ADMIN_MENU],
+        ])
 
     @staticmethod
-    def portfolio_delete_confirm(project_id: int) -> InlineKeyboardBuilder:
-        builder = InlineKeyboardBuilder()
-        builder.button(
-            text=f"{config.EMOJI['success']} Да, удалить", 
-            callback_data=f"pdelete_confirm_{project_id}"
-        )
-        builder.button(
-            text=f"{config.EMOJI['error']} Отмена", 
-            callback_data="admin_portfolio"
-        )
-        
-        return builder.as_markup()
+    @lru_cache(maxsize=2048)
+    def portfolio_edit(project_id: int) -> InlineKeyboardMarkup:
+        return _mk([
+            [_btn(text=_LBL_EDIT_TITLE, callback_data=_CB_PEDIT_TITLE(project_id)),
+             _btn(text=_LBL_EDIT_DESC, callback_data=_CB_PEDIT_DESC(project_id))],
+            [_btn(text=_LBL_EDIT_DETAILS, callback_data=_CB_PEDIT_DETAILS(project_id)),
+             _btn(text=_LBL_EDIT_COST, callback_data=_CB_PEDIT_COST(project_id))],
+            [_btn(text=_LBL_EDIT_TECH, callback_data=_CB_PEDIT_TECH(project_id)),
+             _btn(text=_LBL_EDIT_DURATION, callback_data=_CB_PEDIT_DURATION(project_id))],
+            [_btn(text=_LBL_EDIT_VIDEO, callback_data=_CB_PEDIT_VIDEO(project_id)),
+             _btn(text=_LBL_EDIT_BOT_LINK, callback_data=_CB_PEDIT_BOT(project_id))],
+            [_btn(text=_LBL_TO_MANAGEMENT, callback_data="admin_portfolio")],
+        ])
 
     @staticmethod
-    def project_list(projects: List, action_prefix: str) -> InlineKeyboardBuilder:
-        builder = InlineKeyboardBuilder()
-        for project in projects:
-            title = project.title[:30] + "..." if len(project.title) > 30 else project.title
-            builder.button(
-                text=title, 
-                callback_data=f"{action_prefix}_{project.id}"
-            )
-        builder.button(
-            text=f"{config.EMOJI['back']} Назад", 
-            callback_data="admin_portfolio"
-        )
-        
-        builder.adjust(1)
-        return builder.as_markup()
+    @lru_cache(maxsize=2048)
+    def portfolio_delete_confirm(project_id: int) -> InlineKeyboardMarkup:
+        return _mk([
+            [_btn(text=_LBL_CONFIRM_DELETE, callback_data=_CB_PDELETE_CONFIRM(project_id)),
+             _btn(text=_LBL_CANCEL, callback_data="admin_portfolio")],
+        ])
 
     @staticmethod
-    def back_to_admin_menu() -> InlineKeyboardBuilder:
-        builder = InlineKeyboardBuilder()
-        builder.button(
-            text=f"{config.EMOJI['back']} В админ-меню", 
-            callback_data="admin_panel"
-        )
-        return builder.as_markup()
+    def project_list(projects: List, action_prefix: str) -> InlineKeyboardMarkup:
+        # Ряды собираются напрямую, по одному на проект — без прохода
+        # builder.adjust(); усечение заголовка одним срезом
+        make_cb = (action_prefix + "_%d").__mod__
+        rows = [
+            [_btn(
+                text=t if len(t := project.title) <= 30 else t[:30] + "...",
+                callback_data=make_cb(project.id),
+            )]
+            for project in projects
+        ]
+        rows.append([_BTN_BACK_TO_PORTFOLIO])
+        return _mk(rows)
 
     @staticmethod
-    def success_action(action: str = "back_to_main") -> InlineKeyboardBuilder:
-        builder = InlineKeyboardBuilder()
-        builder.button(
-            text=f"{config.EMOJI['sparkles']} В главное меню", 
-            callback_data=action
-        )
-        return builder.as_markup()
-
-kb = KeyboardBuilder()
-
-def main_menu_keyboard(user_id: int, is_admin: bool = False):
-    return kb.main_menu(user_id, is_admin)
-
-def back_keyboard():
-    return kb.back_button()
-
-def portfolio_keyboard(current_index: int, total: int):
-    return kb.portfolio_navigation(current_index, total)
-
-def back_to_portfolio_keyboard(current_index: int):
-    return kb.portfolio_navigation(current_index, 1, show_details=True)
-
-def admin_menu_keyboard():
-    return kb.admin_menu()
-
-def admin_orders_keyboard():
-    return kb.admin_section_menu("заявок на разработку")
-
-def team_orders_keyboard():
-    return kb.admin_section_menu("заявок в команду")
-
-def cons_orders_keyboard():
-    return kb.admin_section_menu("консультаций")
-
-def order_actions_keyboard(order_id: int, user_id: int, current_index: int, total: int):
-    return kb.item_actions(order_id, user_id, current_index, total, "order")
-
-def application_actions_keyboard(app_id: int, user_id: int, current_index: int, total: int):
-    return kb.item_actions(app_id, user_id, current_index, total, "app")
-
-def consultation_actions_keyboard(req_id: int, user_id: int, current_index: int, total: int):
-    return kb.item_actions(req_id, user_id, current_index, total, "consult")
-
-def portfolio_manage_keyboard():
-    return kb.portfolio_management()
+    def back_to_admin_menu() -> InlineKeyboardBuilder:
+        return _cached("back_to_admin_menu", KeyboardBuilder._build_back_to_admin_menu)
 
-def portfolio_edit_keyboard(project_id: int):
-    return kb.portfolio_edit(project_id)
+    @staticmethod
+    def _build_back_to_admin_menu() -> InlineKeyboardMarkup:
+        return _mk([[_BTN_TO_ADMIN_MENU]])
 
-def portfolio_delete_confirm_keyboard(project_id: int):
-    return kb.portfolio_delete_confirm(project_id)
+    @staticmethod
+    def success_action(action: str = "back_to_main") -> InlineKeyboardBuilder:
+        return _cached(f"success_action_{action}",
+                       lambda: KeyboardBuilder._build_success_action(action))
 
-def back_to_admin_menu_keyboard():
-    return kb.back_to_admin_menu()
+    @staticmethod
+    def _build_success_action(action: str) -> InlineKeyboardMarkup:
+        return _mk([
+            [_btn(text=_LBL_SUCCESS_TO_MAIN, callback_data=action)],
+        ])
 
-def portfolio_project_list_keyboard(projects, action_prefix: str):
-    return kb.project_list(projects, action_prefix)
+kb = KeyboardBuilder()
 
-def back_button():
-    return kb.back_button()
+# Обертки — прямые ссылки на статические методы (и partial там, где нужно
+# довязать аргумент): без экземпляра, дескриптора и лишнего фрейма на вызов,
+# кэшированные разметки отдаются сразу
+main_menu_keyboard = KeyboardBuilder.main_menu
+back_keyboard = KeyboardBuilder.back_button
+back_button = KeyboardBuilder.back_button
+
+# Оба входа бьют в общий lru_cache portfolio_navigation
+portfolio_keyboard = KeyboardBuilder.portfolio_navigation
+back_to_portfolio_keyboard = partial(KeyboardBuilder.portfolio_navigation,
+                                     total=1, show_details=True)
+
+admin_menu_keyboard = KeyboardBuilder.admin_menu
+admin_orders_keyboard = partial(KeyboardBuilder.admin_section_menu, "заявок на разработку")
+team_orders_keyboard = partial(KeyboardBuilder.admin_section_menu, "заявок в команду")
+cons_orders_keyboard = partial(KeyboardBuilder.admin_section_menu, "консультаций")
+
+order_actions_keyboard = partial(KeyboardBuilder.item_actions, item_type="order")
+application_actions_keyboard = partial(KeyboardBuilder.item_actions, item_type="app")
+consultation_actions_keyboard = partial(KeyboardBuilder.item_actions, item_type="consult")
+
+portfolio_manage_keyboard = KeyboardBuilder.portfolio_management
+portfolio_edit_keyboard = KeyboardBuilder.portfolio_edit
+portfolio_delete_confirm_keyboard = KeyboardBuilder.portfolio_delete_confirm
+back_to_admin_menu_keyboard = KeyboardBuilder.back_to_admin_menu
+portfolio_project_list_keyboard = KeyboardBuilder.project_list
 
 def referral_main_menu_keyboard():
-    builder = InlineKeyboardBuilder()
-    builder.button(text=f"{config.EMOJI['chart']} Статистика", callback_data="referral_stats")
-    builder.button(text=f"{config.EMOJI['link']} Моя ссылка", callback_data="referral_link")
-    builder.button(text=f"{config.EMOJI['wallet']} Настроить выплаты", callback_data="referral_setup_wallet")
-    builder.button(text=f"{config.EMOJI['history']} Начисления", callback_data="referral_earnings")
-    builder.button(text=f"{config.EMOJI['money']} Запросить выплату", callback_data="request_payout")
-    builder.button(text=f"{config.EMOJI['back']} В главное меню", callback_data="back_to_main")
-    builder.adjust(2, 1, 1, 1)
-    return builder.as_markup()
+    return _cached("referral_main_menu_keyboard", _build_referral_main_menu_keyboard)
+
+def _build_referral_main_menu_keyboard():
+    return _mk([
+        [_btn(text=_LBL_REF_STATS, callback_data="referral_stats"),
+         _btn(text=_LBL_REF_LINK, callback_data="referral_link")],
+        [_btn(text=_LBL_REF_WALLET, callback_data="referral_setup_wallet")],
+        [_btn(text=_LBL_REF_EARNINGS, callback_data="referral_earnings")],
+        [_btn(text=_LBL_REQUEST_PAYOUT, callback_data="request_payout")],
+        [_BTN_MAIN_MENU],
+    ])
 
 def referral_wallet_methods_keyboard():
-    builder = InlineKeyboardBuilder()
-    builder.button(text=f"{config.EMOJI['card']} Банковская карта", callback_data="wallet_method_card")
-    builder.button(text=f"{config.EMOJI['phone']} СБП (по номеру)", callback_data="wallet_method_sbp")
-    builder.button(text=f"{config.EMOJI['back']} Назад", callback_data="referral_system")
-    builder.adjust(1, 1, 1)
-    return builder.as_markup()
+    return _cached("referral_wallet_methods_keyboard", _build_referral_wallet_methods_keyboard)
+
+def _build_referral_wallet_methods_keyboard():
+    return _mk([
+        [_btn(text=_LBL_WALLET_CARD, callback_data="wallet_method_card")],
+        [_btn(text=_LBL_WALLET_SBP, callback_data="wallet_method_sbp")],
+        [_BTN_BACK_TO_REFERRAL],
+    ])
 
 def referral_earnings_actions_keyboard():
-    builder = InlineKeyboardBuilder()
-    builder.button(text=f"{config.EMOJI['money']} Запросить выплату", callback_data="request_payout")
-    builder.button(text=f"{config.EMOJI['back']} Назад", callback_data="referral_system")
-    builder.adjust(1, 1)
-    return builder.as_markup()
+    return _cached("referral_earnings_actions_keyboard", _build_referral_earnings_actions_keyboard)
+
+def _build_referral_earnings_actions_keyboard():
+    return _mk([
+        [_btn(text=_LBL_REQUEST_PAYOUT, callback_data="request_payout")],
+        [_BTN_BACK_TO_REFERRAL],
+    ])
 
 def admin_referral_payouts_keyboard():
-    builder = InlineKeyboardBuilder()
-    builder.button(text=" Список запросов на выплату", callback_data="admin_payouts_list")
-    builder.button(text=f"{config.EMOJI['back']} В админ-меню", callback_data="admin_panel")
-    builder.adjust(1, 1)
-    return builder.as_markup()
+    return _cached("admin_referral_payouts_keyboard", _build_admin_referral_payouts_keyboard)
+
+def _build_admin_referral_payouts_keyboard():
+    return _mk([
+        [_btn(text=" Список запросов на выплату", callback_data="admin_payouts_list")],
+        [_BTN_TO_ADMIN_MENU],
+    ])
 
 def admin_payment_confirmations_keyboard():
-    builder = InlineKeyboardBuilder()
-    builder.button(text=" Принятые заказы", callback_data="admin_accepted_orders_list")
-    builder.button(text=f"{config.EMOJI['back']} В админ-меню", callback_data="admin_panel")
-    builder.adjust(1, 1)
-    return builder.as_markup()
+    return _cached("admin_payment_confirmations_keyboard", _build_admin_payment_confirmations_keyboard)
 
+def _build_admin_payment_confirmations_keyboard():
+    return _mk([
+        [_btn(text=" Принятые заказы", callback_data="admin_accepted_orders_list")],
+        [_BTN_TO_ADMIN_MENU],
+    ])
+
+@lru_cache(maxsize=2048)
 def payout_actions_keyboard(payout_id: int, current_index: int, total: int):
-    builder = InlineKeyboardBuilder()
-    if total > 1:
-        builder.button(
-            text=f"{config.EMOJI['back']}", 
-            callback_data=f"payout_prev_{current_index}"
-        )
-        builder.button(
-            text=f"{config.EMOJI['next']}", 
-            callback_data=f"payout_next_{current_index}"
-        )
-    builder.button(
-        text=f"{config.EMOJI['success']} Одобрить", 
-        callback_data=f"payout_approve_{payout_id}"
-    )
-    builder.button(
-        text=f"{config.EMOJI['error']} Отклонить", 
-        callback_data=f"payout_reject_{payout_id}"
-    )
-    builder.button(
-        text=f" Выплачено", 
-        callback_data=f"payout_complete_{payout_id}"
-    )
-    builder.button(
-        text=f"{config.EMOJI['back']} К списку",
-        callback_data="admin_payouts_list"
-    )
+    rows = []
     if total > 1:
-        builder.adjust(2, 2, 1, 1)
-    else:
-        builder.adjust(2, 1, 1)
-    return builder.as_markup()
-
+        rows.append([_btn(text=_LBL_PREV_ARROW, callback_data=_CB_PAYOUT_PREV(current_index)),
+                     _btn(text=_LBL_NEXT_ARROW, callback_data=_CB_PAYOUT_NEXT(current_index))])
+    rows.append([_btn(text=_LBL_APPROVE, callback_data=_CB_PAYOUT_APPROVE(payout_id)),
+                 _btn(text=_LBL_REJECT, callback_data=_CB_PAYOUT_REJECT(payout_id))])
+    rows.append([_btn(text=f" Выплачено", callback_data=_CB_PAYOUT_COMPLETE(payout_id))])
+    rows.append([_btn(text=_LBL_TO_LIST, callback_data="admin_payouts_list")])
+    return _mk(rows)
+
+@lru_cache(maxsize=2048)
 def accepted_order_actions_keyboard(order_id: int, current_index: int, total: int):
-    builder = InlineKeyboardBuilder()
+    rows = []
     if total > 1:
-        builder.button(
-            text=f"{config.EMOJI['back']}", 
-            callback_data=f"accepted_order_prev_{current_index}"
-        )
-        builder.button(
-            text=f"{config.EMOJI['next']}", 
-            callback_data=f"accepted_order_next_{current_index}"
-        )
-    builder.button(
-        text=f" Подтвердить оплату", 
-        callback_data=f"confirm_payment_{order_id}"
-    )
-    builder.button(
-        text=f"{config.EMOJI['edit']} Изменить цену", 
-        callback_data=f"order_edit_price_{order_id}"
-    )
-    builder.button(
-        text=f"{config.EMOJI['back']} К списку",
-        callback_data="admin_accepted_orders_list"
-    )
-    if total > 1:
-        builder.adjust(2, 2, 1)
-    else:
-        builder.adjust(2, 1)
-    return builder.as_markup()
\ No newline at end of file
+        rows.append([_btn(text=_LBL_PREV_ARROW, callback_data=_CB_ACCEPTED_PREV(current_index)),
+                     _btn(text=_LBL_NEXT_ARROW, callback_data=_CB_ACCEPTED_NEXT(current_index))])
+    rows.append([_btn(text=f" Подтвердить оплату", callback_data=_CB_CONFIRM_PAYMENT(order_id)),
+                 _btn(text=_LBL_EDIT_PRICE, callback_data=_CB_EDIT_PRICE(order_id))])
+    rows.append([_btn(text=_LBL_TO_LIST, callback_data="admin_accepted_orders_list")])
+    return _mk(rows)
\ No newline at end of file
@@ -1,7 +1,10 @@
 """
 Модуль для кэширования данных и улучшения производительности
 """
-import json
+import asyncio
+import heapq
+import itertools
+import threading
 import time
 from typing import Any, Optional, Dict, Callable
 from functools import wraps
@@ -13,33 +16,46 @@ class CacheManager:
     """Менеджер кэширования для улучшения производительности"""
     
     def __init__(self, default_ttl: int = 300):  # 5 минут по умолчанию
-        self._cache: Dict[str, Dict[str, Any]] = {}
+        # Ключ — любой хэшируемый объект: декоратор cached кладет сюда
+        # структурные кортежи, минуя строковую сериализацию аргументов
+        self._cache: Dict[Any, Dict[str, Any]] = {}
         self.default_ttl = default_ttl
+        # Мин-куча дедлайнов (deadline, seq, key): чистка снимает только
+        # просроченные записи вместо скана всего словаря. Устаревшие
+        # элементы кучи (ключ перезаписан/удален) лениво пропускаются.
+        self._expiry_heap: list = []
+        self._heap_seq = itertools.count()
     
-    def get(self, key: str) -> Optional[Any]:
+    def get(self, key: Any) -> Optional[Any]:
         """Получение значения из кэша"""
         if key not in self._cache:
             return None
         
         cache_item = self._cache[key]
         
-        # Проверяем TTL
-        if time.time() > cache_item['expires_at']:
+        # Проверяем TTL (monotonic не подвержен скачкам NTP/перевода часов)
+        if time.monotonic() > cache_item['expires_at']:
             del self._cache[key]
             return None
         
         return cache_item['value']
     
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+    def set(self, key: Any, value: Any, ttl: Optional[int] = None) -> None:
         """Сохранение значения в кэш"""
         ttl = ttl or self.default_ttl
+        now = time.monotonic()
+        deadline = now + ttl
         self._cache[key] = {
             'value': value,
-            'expires_at': time.time() + ttl,
-            'created_at': time.time()
+            'expires_at': deadline,
+            'created_at': now
         }
+        heapq.heappush(self._expiry_heap, (deadline, next(self._heap_seq), key))
+        # Амортизированная чистка: по чуть-чуть на каждой записи,
+        # фоновый cleanup_expired остается страховкой
+        self._sweep(limit=8)
     
-    def delete(self, key: str) -> bool:
+    def delete(self, key: Any) -> bool:
         """Удаление значения из кэша"""
         if key in self._cache:
             del self._cache[key]
@@ -50,22 +66,32 @@ class CacheManager:
         """Очистка всего кэша"""
         self._cache.clear()
     
+    def _sweep(self, limit: Optional[int] = None) -> int:
+        """Снятие просроченных записей с вершины кучи.
+
+        O(k log n) по числу просроченных вместо полного скана словаря;
+        limit ограничивает работу на горячем пути.
+        """
+        now = time.monotonic()
+        removed = 0
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now and (limit is None or removed < limit):
+            deadline, _, key = heapq.heappop(heap)
+            item = self._cache.get(key)
+            # Запись могла быть перезаписана с новым дедлайном или удалена —
+            # такие элементы кучи просто пропускаем
+            if item is not None and item['expires_at'] == deadline:
+                del self._cache[key]
+                removed += 1
+        return removed
+
     def cleanup_expired(self) -> int:
         """Очистка просроченных записей"""
-        current_time = time.time()
-        expired_keys = [
-            key for key, item in self._cache.items()
-            if current_time > item['expires_at']
-        ]
-        
-        for key in expired_keys:
-            del self._cache[key]
-        
-        return len(expired_keys)
+        return self._sweep()
     
     def get_stats(self) -> Dict[str, Any]:
         """Получение статистики кэша"""
-        current_time = time.time()
+        current_time = time.monotonic()
         active_items = sum(
             1 for item in self._cache.values()
             if current_time <= item['expires_at']
@@ -81,27 +107,92 @@ class CacheManager:
 cache = CacheManager()
 
 def cached(ttl: int = 300, key_func: Optional[Callable] = None):
-    """Декоратор для кэширования результатов функций"""
+    """Декоратор для кэширования результатов функций.
+
+    Промахи по одному ключу коалесцируются: при истечении TTL значение
+    пересчитывает только первый вызов, остальные ждут его результат
+    вместо параллельного шторма одинаковых запросов к БД (cache stampede).
+    """
     def decorator(func: Callable) -> Callable:
+        def make_key(args, kwargs):
+            # Структурный кортеж вместо стрингификации аргументов:
+            # хэширование кортежа идет на C, без временных строк, сортировки
+            # при пустых kwargs и коллизий по hash()
+            if key_func:
+                return key_func(*args, **kwargs)
+            cache_key = (func.__qualname__, args,
+                         tuple(sorted(kwargs.items())) if kwargs else ())
+            try:
+                hash(cache_key)
+            except TypeError:
+                # Нехэшируемые аргументы (dict/list) — редкий путь,
+                # откатываемся к repr-ключу
+                cache_key = f"{func.__qualname__}:{args!r}:{sorted(kwargs.items())!r}"
+            return cache_key
+
+        if asyncio.iscoroutinefunction(func):
+            # Корутины коалесцируем через Future: конкурирующие вызовы
+            # ждут один общий пересчет, не блокируя event loop
+            _inflight: Dict[Any, asyncio.Future] = {}
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                cache_key = make_key(args, kwargs)
+                cached_result = cache.get(cache_key)
+                if cached_result is not None:
+                    logger.debug(f"Cache hit for {cache_key}")
+                    return cached_result
+
+                pending = _inflight.get(cache_key)
+                if pending is not None:
+                    return await pending
+
+                future = asyncio.get_running_loop().create_future()
+                _inflight[cache_key] = future
+                try:
+                    result = await func(*args, **kwargs)
+                    cache.set(cache_key, result, ttl)
+                    logger.debug(f"Cache miss for {cache_key}, result cached")
+                    future.set_result(result)
+                    return result
+                except BaseException as exc:
+                    future.set_exception(exc)
+                    # Помечаем исключение прочитанным на случай,
+                    # если ожидающих не было
+                    future.exception()
+                    raise
+                finally:
+                    _inflight.pop(cache_key, None)
+            return async_wrapper
+
+        # Синхронный путь: per-key threading.Lock с double-checked get
+        _locks: Dict[Any, threading.Lock] = {}
+        _locks_guard = threading.Lock()
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Генерируем ключ кэша
-            if key_func:
-                cache_key = key_func(*args, **kwargs)
-            else:
-                cache_key = f"{func.__name__}:{hash(str(args) + str(sorted(kwargs.items())))}"
-            
-            # Пытаемся получить из кэша
+            cache_key = make_key(args, kwargs)
             cached_result = cache.get(cache_key)
             if cached_result is not None:
                 logger.debug(f"Cache hit for {cache_key}")
                 return cached_result
-            
-            # Выполняем функцию и кэшируем результат
-            result = func(*args, **kwargs)
-            cache.set(cache_key, result, ttl)
-            logger.debug(f"Cache miss for {cache_key}, result cached")
-            
+
+            with _locks_guard:
+                lock = _locks.setdefault(cache_key, threading.Lock())
+            with lock:
+                # Пока ждали лок, значение мог положить другой поток
+                cached_result = cache.get(cache_key)
+                if cached_result is not None:
+                    logger.debug(f"Cache hit for {cache_key}")
+                    return cached_result
+
+                result = func(*args, **kwargs)
+                cache.set(cache_key, result, ttl)
+                logger.debug(f"Cache miss for {cache_key}, result cached")
+            # Не даем словарю локов расти вместе с множеством ключей;
+            # редкая гонка здесь лишь приводит к лишнему пересчету
+            with _locks_guard:
+                _locks.pop(cache_key, None)
             return result
         return wrapper
     return decorator
@@ -211,8 +302,8 @@ def get_portfolio_cached():
 
 def invalidate_admin_cache():
     """Инвалидация кэша админа при изменениях"""
-    cache.delete("get_admin_stats_cached:")
+    cache.delete(("get_admin_stats_cached", (), ()))
     
 def invalidate_portfolio_cache():
     """Инвалидация кэша портфолио при изменениях"""
-    cache.delete("get_portfolio_cached:")
+    cache.delete(("get_portfolio_cached", (), ()))
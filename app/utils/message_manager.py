@@ -1,46 +1,138 @@
+import asyncio
 import logging
+from contextlib import suppress
+from functools import lru_cache
 from typing import Optional, Dict, Any, List
 from aiogram import Bot
 from aiogram.types import InlineKeyboardMarkup, InputMediaVideo, MessageEntity
 
+try:
+    from redis import asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+from config import config
+
 logger = logging.getLogger(__name__)
 
+# TTL разделяемого состояния сообщений в Redis
+_REDIS_STATE_TTL = 3600
+
+class UserMsgState:
+    """Служебные message_id одного пользователя одним компактным объектом.
+
+    Вместо трех параллельных словарей — один lookup по user_id;
+    __slots__ убирает per-instance __dict__.
+    """
+    __slots__ = ('main', 'question', 'success')
+
+    def __init__(self):
+        self.main: Optional[int] = None
+        self.question: Optional[int] = None
+        self.success: Optional[int] = None
+
 class MessageManager:
-    
+
     def __init__(self):
-        self.user_main_messages: Dict[int, int] = {}
-        self.last_question_message_id: Dict[int, int] = {}
-        self.success_message_id: Dict[int, int] = {}
-    
+        self._user_states: Dict[int, UserMsgState] = {}
+        # (message_id, text_hash, markup_hash) последнего успешного рендера —
+        # позволяет пропустить редактирование, если контент не изменился
+        self._last_rendered: Dict[int, tuple] = {}
+        # Недавно удаленные id сообщений — повторное удаление не ходит в API
+        self._deleted_messages: Dict[int, set] = {}
+        # Разделяемое хранилище для горизонтального масштабирования:
+        # локальные dict'ы остаются L1-кэшем, Redis — общий источник между воркерами
+        self._redis = None
+        if aioredis is not None and config.REDIS_URL:
+            try:
+                self._redis = aioredis.from_url(config.REDIS_URL, decode_responses=True)
+            except Exception as e:
+                logger.warning(f"MessageManager: Redis unavailable, using in-process state: {e}")
+
+    def _persist(self, user_id: int, field: str, message_id: Optional[int]) -> None:
+        """Фоновая запись поля в Redis-хэш mm:{user_id} (fire-and-forget)."""
+        if self._redis is None:
+            return
+
+        async def _write():
+            with suppress(Exception):
+                key = f"mm:{user_id}"
+                if message_id is None:
+                    await self._redis.hdel(key, field)
+                else:
+                    await self._redis.hset(key, field, message_id)
+                    await self._redis.expire(key, _REDIS_STATE_TTL)
+
+        with suppress(RuntimeError):  # вне event loop (тесты, импорт) — пишем только локально
+            asyncio.get_running_loop().create_task(_write())
+
+    def _state(self, user_id: int) -> UserMsgState:
+        state = self._user_states.get(user_id)
+        if state is None:
+            state = self._user_states[user_id] = UserMsgState()
+        return state
+
+    def _clear_slot(self, user_id: int, slot: str) -> None:
+        """Обнуление одного слота; опустевшая запись удаляется целиком."""
+        state = self._user_states.get(user_id)
+        if state is not None:
+            setattr(state, slot, None)
+            if state.main is None and state.question is None and state.success is None:
+                del self._user_states[user_id]
+
+    async def _load_field(self, user_id: int, field: str, slot: str) -> Optional[int]:
+        """message_id из L1-кэша, при промахе — из Redis (другой воркер)."""
+        state = self._user_states.get(user_id)
+        message_id = getattr(state, slot) if state else None
+        if message_id is None and self._redis is not None:
+            with suppress(Exception):
+                value = await self._redis.hget(f"mm:{user_id}", field)
+                if value:
+                    message_id = int(value)
+                    setattr(self._state(user_id), slot, message_id)
+        return message_id
+
+    async def _load_main_message(self, user_id: int) -> Optional[int]:
+        return await self._load_field(user_id, "main", "main")
+
     def set_main_message(self, user_id: int, message_id: int) -> None:
-        self.user_main_messages[user_id] = message_id
-    
+        self._state(user_id).main = message_id
+        if self._last_rendered.get(user_id, (None,))[0] != message_id:
+            self._last_rendered.pop(user_id, None)
+        self._persist(user_id, "main", message_id)
+
     def get_main_message(self, user_id: int) -> Optional[int]:
-        return self.user_main_messages.get(user_id)
-    
+        state = self._user_states.get(user_id)
+        return state.main if state else None
+
     def clear_main_message(self, user_id: int) -> None:
-        if user_id in self.user_main_messages:
-            del self.user_main_messages[user_id]
-    
+        self._clear_slot(user_id, "main")
+        self._last_rendered.pop(user_id, None)
+        self._persist(user_id, "main", None)
+
     def set_last_question(self, user_id: int, message_id: int) -> None:
-        self.last_question_message_id[user_id] = message_id
-    
+        self._state(user_id).question = message_id
+        self._persist(user_id, "last", message_id)
+
     def get_last_question(self, user_id: int) -> Optional[int]:
-        return self.last_question_message_id.get(user_id)
-    
+        state = self._user_states.get(user_id)
+        return state.question if state else None
+
     def clear_last_question(self, user_id: int) -> None:
-        if user_id in self.last_question_message_id:
-            del self.last_question_message_id[user_id]
-    
+        self._clear_slot(user_id, "question")
+        self._persist(user_id, "last", None)
+
     def set_success_message(self, user_id: int, message_id: int) -> None:
-        self.success_message_id[user_id] = message_id
-    
+        self._state(user_id).success = message_id
+        self._persist(user_id, "success", message_id)
+
     def get_success_message(self, user_id: int) -> Optional[int]:
-        return self.success_message_id.get(user_id)
-    
+        state = self._user_states.get(user_id)
+        return state.success if state else None
+
     def clear_success_message(self, user_id: int) -> None:
-        if user_id in self.success_message_id:
-            del self.success_message_id[user_id]
+        self._clear_slot(user_id, "success")
+        self._persist(user_id, "success", None)
     
     async def edit_main_message(
         self, 
@@ -53,11 +145,17 @@ class MessageManager:
     ) -> bool:
         try:
             if message_id is None:
-                message_id = self.get_main_message(user_id)
+                message_id = await self._load_main_message(user_id)
 
             if message_id is None or bot is None:
                 return False
 
+            # Если сообщение уже показывает этот текст и клавиатуру —
+            # Telegram вернет "message is not modified", экономим round-trip
+            rendered = (message_id, hash(text), hash(repr(reply_markup)))
+            if entities is None and self._last_rendered.get(user_id) == rendered:
+                return True
+
             try:
                 await bot.edit_message_text(
                     chat_id=user_id,
@@ -67,6 +165,10 @@ class MessageManager:
                     parse_mode=None if entities else "HTML",
                     entities=entities,
                 )
+                if entities is None:
+                    self._last_rendered[user_id] = rendered
+                else:
+                    self._last_rendered.pop(user_id, None)
                 return True
             except Exception as edit_text_err:
                 try:
@@ -78,6 +180,7 @@ class MessageManager:
                         parse_mode=None if entities else "HTML",
                         caption_entities=entities,
                     )
+                    self._last_rendered.pop(user_id, None)
                     return True
                 except Exception as edit_caption_err:
                     try:
@@ -113,7 +216,7 @@ class MessageManager:
             if bot is None:
                 return False
 
-            main_id = self.get_main_message(user_id)
+            main_id = await self._load_main_message(user_id)
             if main_id:
                 try:
                     media = InputMediaVideo(
@@ -128,6 +231,7 @@ class MessageManager:
                         media=media,
                         reply_markup=reply_markup,
                     )
+                    self._last_rendered.pop(user_id, None)
                     return True
                 except Exception:
                     pass
@@ -152,15 +256,12 @@ class MessageManager:
         if not emoji_char_to_id:
             return entities
 
-        def utf16_offset(s: str) -> int:
-            return len(s.encode("utf-16-le")) // 2
-
-        text_len = len(text)
-        i = 0
-        while i < text_len:
-            ch = text[i]
+        # Один проход с накоплением UTF-16 смещения: кодопоинты за пределами
+        # BMP занимают суррогатную пару (2 юнита). Прежний вариант кодировал
+        # text[:i] на каждом совпадении — O(n^2) на длинных текстах.
+        offset_units = 0
+        for ch in text:
             if ch in emoji_char_to_id and emoji_char_to_id[ch]:
-                offset_units = utf16_offset(text[:i])
                 entities.append(
                     MessageEntity(
                         type="custom_emoji",
@@ -169,13 +270,36 @@ class MessageManager:
                         custom_emoji_id=emoji_char_to_id[ch],
                     )
                 )
-            i += 1
+            offset_units += 2 if ord(ch) > 0xFFFF else 1
         return entities
-    
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def cached_custom_emoji_entities(text: str) -> List[MessageEntity]:
+        """Мемоизированный скан текста на premium-эмодзи (config.EMOJI_CUSTOM).
+
+        Карточки портфолио листают по кругу одни и те же N текстов —
+        повторный вызов возвращает готовый список без сканирования.
+        Вызывающий код список не мутирует.
+        """
+        return MessageManager.build_custom_emoji_entities(text, config.EMOJI_CUSTOM)
+
+    async def safe_delete(self, user_id: int, message_id: int, bot: Bot) -> None:
+        """Удаление "в лучшем случае": ошибки Telegram подавляются, а уже
+        удаленные сообщения не порождают повторный API-вызов."""
+        seen = self._deleted_messages.setdefault(user_id, set())
+        if message_id in seen:
+            return
+        with suppress(Exception):
+            await bot.delete_message(user_id, message_id)
+        if len(seen) >= 50:
+            seen.clear()
+        seen.add(message_id)
+
     async def delete_message(
-        self, 
-        user_id: int, 
-        message_id: int, 
+        self,
+        user_id: int,
+        message_id: int,
         bot: Bot
     ) -> bool:
         try:
@@ -186,7 +310,7 @@ class MessageManager:
             return False
     
     async def delete_last_question(self, user_id: int, bot: Bot) -> bool:
-        message_id = self.get_last_question(user_id)
+        message_id = await self._load_field(user_id, "last", "question")
         if message_id:
             success = await self.delete_message(user_id, message_id, bot)
             if success:
@@ -195,7 +319,7 @@ class MessageManager:
         return False
     
     async def delete_success_message(self, user_id: int, bot: Bot) -> bool:
-        message_id = self.get_success_message(user_id)
+        message_id = await self._load_field(user_id, "success", "success")
         if message_id:
             success = await self.delete_message(user_id, message_id, bot)
             if success:
@@ -204,15 +328,18 @@ class MessageManager:
         return False
     
     def clear_user_data(self, user_id: int) -> None:
-        self.clear_main_message(user_id)
-        self.clear_last_question(user_id)
-        self.clear_success_message(user_id)
-    
+        # Одним pop вместо трех отдельных очисток
+        self._user_states.pop(user_id, None)
+        self._last_rendered.pop(user_id, None)
+        for field in ("main", "last", "success"):
+            self._persist(user_id, field, None)
+
     def get_user_stats(self) -> Dict[str, int]:
+        states = list(self._user_states.values())
         return {
-            "total_users": len(self.user_main_messages),
-            "active_questions": len(self.last_question_message_id),
-            "success_messages": len(self.success_message_id)
+            "total_users": sum(1 for s in states if s.main is not None),
+            "active_questions": sum(1 for s in states if s.question is not None),
+            "success_messages": sum(1 for s in states if s.success is not None)
         }
 
 message_manager = MessageManager()
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import List, Optional
 from aiogram import Bot
@@ -19,22 +20,23 @@ class NotificationManager:
         bot: Bot, 
         parse_mode: str = "HTML"
     ) -> List[int]:
-        """Отправка уведомления всем администраторам"""
+        """Отправка уведомления всем администраторам (параллельно)"""
+        results = await asyncio.gather(
+            *[
+                bot.send_message(chat_id=admin_id, text=message, parse_mode=parse_mode)
+                for admin_id in self.admin_ids
+            ],
+            return_exceptions=True,
+        )
+
         successful_sends = []
-        
-        for admin_id in self.admin_ids:
-            try:
-                await bot.send_message(
-                    chat_id=admin_id,
-                    text=message,
-                    parse_mode=parse_mode
-                )
+        for admin_id, result in zip(self.admin_ids, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to send notification to admin {admin_id}: {result}")
+            else:
                 successful_sends.append(admin_id)
                 logger.info(f"Notification sent to admin {admin_id}")
-                
-            except Exception as e:
-                logger.error(f"Failed to send notification to admin {admin_id}: {e}")
-        
+
         return successful_sends
     
     async def notify_admin(
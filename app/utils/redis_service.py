@@ -0,0 +1,35 @@
+"""
+Общий Redis-клиент с пулом соединений для всех компонентов бота
+"""
+import logging
+
+try:
+    from redis import asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+_client = None
+
+def get_redis():
+    """Единый клиент поверх ConnectionPool (создается лениво один раз).
+
+    Возвращает None, если Redis не настроен (REDIS_URL пуст) или пакет
+    redis не установлен — вызывающий код в этом случае работает без
+    разделяемого кэша.
+    """
+    global _client
+    if _client is None and aioredis is not None and config.REDIS_URL:
+        try:
+            pool = aioredis.ConnectionPool.from_url(
+                config.REDIS_URL,
+                max_connections=100,
+                decode_responses=True,
+            )
+            _client = aioredis.Redis(connection_pool=pool)
+        except Exception as e:
+            logger.warning(f"Redis unavailable, continuing without shared cache: {e}")
+    return _client
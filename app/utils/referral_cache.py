@@ -0,0 +1,74 @@
+"""
+Короткоживущий кэш реферальной статистики: переключение между экранами
+реферального меню не дергает БД на каждое нажатие
+"""
+import asyncio
+import time
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from app.db import async_db
+
+logger = logging.getLogger(__name__)
+
+# Несколько секунд достаточно, чтобы покрыть серию кликов по меню,
+# но не показывать устаревший баланс
+_TTL = 5.0
+_MAX_SIZE = 4096
+
+_stats_cache: Dict[int, Tuple[Optional[dict], float]] = {}
+_locks: Dict[int, asyncio.Lock] = {}
+
+async def get_stats_cached(user_id: int) -> Optional[dict]:
+    """Статистика реферала с 5-секундным кэшем.
+
+    Промахи коалесцируются через per-user лок: шквал callback'ов
+    от одного пользователя приводит к единственному SQL-запросу.
+    """
+    entry = _stats_cache.get(user_id)
+    if entry and time.monotonic() - entry[1] < _TTL:
+        return entry[0]
+
+    lock = _locks.setdefault(user_id, asyncio.Lock())
+    async with lock:
+        # Пока ждали лок, соседняя корутина могла уже обновить запись
+        entry = _stats_cache.get(user_id)
+        if entry and time.monotonic() - entry[1] < _TTL:
+            return entry[0]
+
+        stats = await async_db.get_referral_stats(user_id)
+        if len(_stats_cache) >= _MAX_SIZE:
+            _stats_cache.clear()
+            # Локи выселяем вместе с записями, иначе словарь растет
+            # по одному Lock на каждого когда-либо виденного пользователя
+            _locks.clear()
+        _stats_cache[user_id] = (stats, time.monotonic())
+        return stats
+
+# Кэш код -> user_id реферера: трафик по ссылкам сильно перекошен в пользу
+# нескольких активных рефереров, а их коды никогда не меняются. TTL
+# страхует единственный нетипичный случай — код появился только что.
+_CODE_TTL = 300.0
+_CODE_MAX_SIZE = 1024
+
+_code_cache: Dict[str, Tuple[Optional[int], float]] = {}
+
+async def resolve_referrer_cached(referral_code: str) -> Optional[int]:
+    """user_id владельца реферального кода или None, если код не существует."""
+    entry = _code_cache.get(referral_code)
+    if entry and time.monotonic() - entry[1] < _CODE_TTL:
+        return entry[0]
+
+    referrer = await async_db.get_referral_user_by_code(referral_code)
+    referrer_id = referrer.user_id if referrer else None
+    if len(_code_cache) >= _CODE_MAX_SIZE:
+        _code_cache.clear()
+    _code_cache[referral_code] = (referrer_id, time.monotonic())
+    return referrer_id
+
+def invalidate(user_id: int) -> None:
+    """Сброс кэша пользователя — вызывается после записи реквизитов
+    или создания запроса на выплату."""
+    _stats_cache.pop(user_id, None)
+    # Редкая гонка с держателем лока лишь дает один лишний SQL-запрос
+    _locks.pop(user_id, None)
@@ -4,6 +4,180 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+_EMOJI_DICT = {
+    "bot": "🤖",
+    "team": "👥",
+    "portfolio": "🎨",
+    "consultation": "💬",
+    "admin": "👑",
+    "back": "◀️",
+    "next": "▶️",
+    "success": "✅",
+    "error": "❌",
+    "warning": "⚠️",
+    "info": "ℹ️",
+    "edit": "✏️",
+    "delete": "🗑️",
+    "add": "➕",
+    "contact": "📞",
+    "channel": "📢",
+    "star": "⭐",
+    "fire": "🔥",
+    "rocket": "🚀",
+    "gem": "💎",
+    "crown": "👑",
+    "lightning": "⚡",
+    "sparkles": "✨",
+    "target": "🎯",
+    "magic": "🪄",
+    "crystal": "🔮",
+    "trophy": "🏆",
+    "medal": "🥇",
+    "shield": "🛡️",
+    "key": "🔑",
+    "lock": "🔒",
+    "home": "🏠",
+    "arrow_up": "⬆️",
+    "arrow_down": "⬇️",
+    "check": "✔️",
+    "gift": "🎁",
+    "money": "💰",
+    "chart": "📊",
+    "wallet": "💳",
+    "history": "📋",
+    "link": "🔗",
+    "card": "💳",
+    "phone": "📱",
+    "person": "👤",
+    "request": "💸",
+    "refresh": "🔄",
+    "pending": "⏳",
+    "confirmed": "✅",
+    "paid": "💸",
+    "balance": "💰",
+    "referral": "👥",
+    "earnings": "💵",
+    "payout": "💸",
+    "cross": "✖️",
+    "heart": "❤️",
+    "thumbs_up": "👍",
+    "handshake": "🤝",
+    "time": "⏰",
+    "calendar": "📅",
+    "document": "📄",
+    "bulb": "💡",
+    "tools": "🛠️",
+    "gear": "⚙️",
+    "cloud": "☁️",
+    "hammer": "🔨",
+    "wrench": "🔧",
+    "folder": "📁",
+    "orders": "📦",
+    "diamond": "💎",
+    "computer": "💻",
+    "robot": "🤖",
+    "miniapp": "📱",
+    "email": "📧",
+    "message": "💌",
+    "bell": "🔔",
+    "megaphone": "📣",
+    "loudspeaker": "📢",
+    "microphone": "🎤",
+    "camera": "📷",
+    "video": "🎥",
+    "play": "▶️",
+    "pause": "⏸️",
+    "stop": "⏹️",
+    "record": "⏺️",
+    "fast_forward": "⏩",
+    "rewind": "⏪",
+    "repeat": "🔁",
+    "shuffle": "🔀",
+    "volume_up": "🔊",
+    "volume_down": "🔉",
+    "mute": "🔇",
+    "battery": "🔋",
+    "plug": "🔌",
+    "signal": "📶",
+    "wifi": "📶",
+    "bluetooth": "📶",
+    "location": "📍",
+    "map": "🗺️",
+    "compass": "🧭",
+    "globe": "🌍",
+    "satellite": "🛰️",
+    "airplane": "✈️",
+    "car": "🚗",
+    "train": "🚆",
+    "ship": "🚢",
+    "bicycle": "🚴",
+    "walking": "🚶",
+    "running": "🏃",
+    "dancing": "💃",
+    "music": "🎵",
+    "note": "🎶",
+    "headphones": "🎧",
+    "radio": "📻",
+    "tv": "📺",
+    "movie": "🎬",
+    "game": "🎮",
+    "dice": "🎲",
+    "puzzle": "🧩",
+    "art": "🎨",
+    "brush": "🖌️",
+    "palette": "🎨",
+    "frame": "🖼️",
+    "book": "📚",
+    "newspaper": "📰",
+    "magazine": "📖",
+    "scroll": "📜",
+    "page": "📃",
+    "clipboard": "📋",
+    "pushpin": "📌",
+    "paperclip": "📎",
+    "ruler": "📏",
+    "triangular_ruler": "📐",
+    "scissors": "✂️",
+    "pen": "🖊️",
+    "pencil": "✏️",
+    "crayon": "🖍️",
+    "paintbrush": "🖌️",
+    "magnifying_glass": "🔍",
+    "microscope": "🔬",
+    "telescope": "🔭",
+    "crystal_ball": "🔮",
+    "joystick": "🕹️",
+    "slot_machine": "🎰",
+    "bowling": "🎳",
+    "pool": "🎱",
+    "yo_yo": "🪀",
+    "kite": "🪁",
+    "magic_wand": "🪄"
+}
+
+class _EmojiNamespace:
+    """Эмодзи как атрибуты (EMOJI.robot) — быстрее, чем dict-доступ.
+
+    Доступ по ключу (EMOJI['robot']) сохранен для обратной совместимости.
+    """
+    __slots__ = tuple(_EMOJI_DICT)
+
+    def __init__(self, values):
+        for name, value in values.items():
+            setattr(self, name, value)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __contains__(self, key):
+        return hasattr(self, key)
+
 class Config:
     BOT_TOKEN = os.getenv("BOT_TOKEN", "8076800755:AAETbYbCio_e1cM_lErJmovtVyTPzpxbNJw")
     CHANNEL_LINK = os.getenv("CHANNEL_LINK", "https://t.me/codifofficial")
@@ -13,156 +187,12 @@ class Config:
         if admin_id.strip().isdigit()
     ]
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///bot.db")
+    REDIS_URL = os.getenv("REDIS_URL", "")
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     MAX_MESSAGE_LENGTH = 4096
     MAX_BUTTONS_PER_ROW = 2
-    EMOJI = {
-        "bot": "🤖",
-        "team": "👥", 
-        "portfolio": "🎨",
-        "consultation": "💬",
-        "admin": "👑",
-        "back": "◀️",
-        "next": "▶️",
-        "success": "✅",
-        "error": "❌",
-        "warning": "⚠️",
-        "info": "ℹ️",
-        "edit": "✏️",
-        "delete": "🗑️",
-        "add": "➕",
-        "contact": "📞",
-        "channel": "📢",
-        "star": "⭐",
-        "fire": "🔥",
-        "rocket": "🚀",
-        "gem": "💎",
-        "crown": "👑",
-        "lightning": "⚡",
-        "sparkles": "✨",
-        "target": "🎯",
-        "magic": "🪄",
-        "crystal": "🔮",
-        "trophy": "🏆",
-        "medal": "🥇",
-        "shield": "🛡️",
-        "key": "🔑",
-        "lock": "🔒",
-        "home": "🏠",
-        "arrow_up": "⬆️",
-        "arrow_down": "⬇️",
-        "check": "✔️",
-        "gift": "🎁",
-        "money": "💰",
-        "chart": "📊",
-        "wallet": "💳",
-        "history": "📋",
-        "link": "🔗",
-        "card": "💳",
-        "phone": "📱",
-        "person": "👤",
-        "request": "💸",
-        "refresh": "🔄",
-        "pending": "⏳",
-        "confirmed": "✅",
-        "paid": "💸",
-        "balance": "💰",
-        "referral": "👥",
-        "earnings": "💵",
-        "payout": "💸",
-        "cross": "✖️",
-        "heart": "❤️",
-        "thumbs_up": "👍",
-        "handshake": "🤝",
-        "money": "💰",
-        "time": "⏰",
-        "calendar": "📅",
-        "document": "📄",
-        "bulb": "💡",
-        "chart": "📊",
-        "tools": "🛠️",
-        "computer": "💻",
-        "phone": "📱",
-        "robot": "🤖",
-        "miniapp": "📱",
-        "email": "📧",
-        "message": "💌",
-        "bell": "🔔",
-        "megaphone": "📣",
-        "loudspeaker": "📢",
-        "microphone": "🎤",
-        "camera": "📷",
-        "video": "🎥",
-        "play": "▶️",
-        "pause": "⏸️",
-        "stop": "⏹️",
-        "record": "⏺️",
-        "fast_forward": "⏩",
-        "rewind": "⏪",
-        "repeat": "🔁",
-        "shuffle": "🔀",
-        "volume_up": "🔊",
-        "volume_down": "🔉",
-        "mute": "🔇",
-        "battery": "🔋",
-        "plug": "🔌",
-        "signal": "📶",
-        "wifi": "📶",
-        "bluetooth": "📶",
-        "location": "📍",
-        "map": "🗺️",
-        "compass": "🧭",
-        "globe": "🌍",
-        "satellite": "🛰️",
-        "airplane": "✈️",
-        "car": "🚗",
-        "train": "🚆",
-        "ship": "🚢",
-        "bicycle": "🚴",
-        "walking": "🚶",
-        "running": "🏃",
-        "dancing": "💃",
-        "music": "🎵",
-        "note": "🎶",
-        "headphones": "🎧",
-        "radio": "📻",
-        "tv": "📺",
-        "movie": "🎬",
-        "game": "🎮",
-        "dice": "🎲",
-        "puzzle": "🧩",
-        "art": "🎨",
-        "brush": "🖌️",
-        "palette": "🎨",
-        "frame": "🖼️",
-        "book": "📚",
-        "newspaper": "📰",
-        "magazine": "📖",
-        "scroll": "📜",
-        "page": "📃",
-        "clipboard": "📋",
-        "pushpin": "📌",
-        "paperclip": "📎",
-        "ruler": "📏",
-        "triangular_ruler": "📐",
-        "scissors": "✂️",
-        "pen": "🖊️",
-        "pencil": "✏️",
-        "crayon": "🖍️",
-        "paintbrush": "🖌️",
-        "magnifying_glass": "🔍",
-        "microscope": "🔬",
-        "telescope": "🔭",
-        "crystal_ball": "🔮",
-        "joystick": "🕹️",
-        "slot_machine": "🎰",
-        "bowling": "🎳",
-        "pool": "🎱",
-        "yo_yo": "🪀",
-        "kite": "🪁",
-        "magic_wand": "🪄"
-    }
+    EMOJI = _EmojiNamespace(_EMOJI_DICT)
     MESSAGES = {
         "welcome": (
         f"{EMOJI['sparkles']} <b>Добро пожаловать в Codif Bot!</b> {EMOJI['sparkles']}\n\n"
@@ -2,13 +2,26 @@ import asyncio
 import logging
 import signal
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 
 from aiogram import Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.fsm.storage.memory import MemoryStorage
+
+try:
+    from aiogram.fsm.storage.redis import RedisStorage
+except ImportError:
+    RedisStorage = None
 from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 from aiohttp import web
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 from config import config
 from app.handlers.admin import admin_router
 from app.handlers.main import main_router
@@ -27,8 +40,14 @@ logger = logging.getLogger(__name__)
 
 class BotApplication:
     def __init__(self):
-        self.bot = Bot(token=config.BOT_TOKEN)
-        self.dp = Dispatcher(storage=MemoryStorage())
+        # Один пул keep-alive соединений к api.telegram.org на весь процесс:
+        # без него каждый send_message платит за новый TLS-хендшейк
+        self.bot = Bot(
+            token=config.BOT_TOKEN,
+            session=AiohttpSession(limit=200),
+            default=DefaultBotProperties(parse_mode="HTML")
+        )
+        self.dp = Dispatcher(storage=self._create_storage())
         self.app = None
         self.webhook_path = None
         self.webhook_url = None
@@ -36,6 +55,19 @@ class BotApplication:
         self.dp.include_router(admin_router)
         self._setup_signal_handlers()
     
+    @staticmethod
+    def _create_storage():
+        """FSM-хранилище: Redis (переживает рестарты, общее между воркерами)
+        или MemoryStorage, если Redis не настроен."""
+        if RedisStorage is not None and config.REDIS_URL:
+            try:
+                storage = RedisStorage.from_url(config.REDIS_URL)
+                logger.info("Using RedisStorage for FSM state")
+                return storage
+            except Exception as e:
+                logger.warning(f"RedisStorage unavailable, falling back to memory: {e}")
+        return MemoryStorage()
+
     def _setup_signal_handlers(self):
         for sig in (signal.SIGINT, signal.SIGTERM):
             signal.signal(sig, self._signal_handler)
@@ -130,6 +162,11 @@ async def bot_lifetime():
 async def main():
     try:
         logger.info("Starting Codif Bot...")
+        # Пул для asyncio.to_thread: синхронный DAO ходит в БД из потоков,
+        # дефолтных min(32, cpu+4) воркеров под нагрузкой может не хватить
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=32, thread_name_prefix="db")
+        )
         async with bot_lifetime() as bot_app:
             if not await bot_app.health_check():
                 logger.error("Bot health check failed, exiting...")
@@ -148,6 +185,10 @@ async def main():
         raise
 
 if __name__ == "__main__":
+    # uvloop заметно ускоряет планировщик asyncio; на платформах без него
+    # (Windows) остается стандартный event loop
+    if uvloop is not None:
+        uvloop.install()
     try:
         asyncio.run(main())
     except KeyboardInterrupt: